@@ -0,0 +1,246 @@
+"""Instrumentación de los dashboards (RITA y Pima): spans, cachés y memoria.
+
+Cada ejecución (rerun) de Streamlit abre con `begin_run` y cierra con
+`end_run`; las páginas envuelven su cuerpo en `instrumented_run`, que llama
+a `end_run` también cuando el script sale antes con `st.stop()`,
+`st.rerun()` o una excepción. Entre ambas, `span` mide el tiempo y la variación de RSS de un
+bloque, y las funciones cacheadas marcan con `cache_miss()` cuando su cuerpo
+realmente se ejecuta: un span con `cached=True` sin esa marca cuenta como
+acierto.
+
+Salidas, todas opcionales:
+
+* `APP_TRACE_LOG=1`: un log JSON por span (logger `instrumentation`).
+* `APP_METRICS_FILE=/ruta/app.prom`: texto Prometheus acumulado del proceso,
+  reescrito al final de cada ejecución (p. ej. para el textfile collector).
+* `APP_DEBUG_PANEL=1` o `?debug=1` en la URL: desglose de la ejecución actual
+  en la barra lateral.
+"""
+import json
+import logging
+import os
+import resource
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+TRACE_LOG = os.environ.get("APP_TRACE_LOG", "0") == "1"
+METRICS_FILE = os.environ.get("APP_METRICS_FILE")
+DEBUG_PANEL = os.environ.get("APP_DEBUG_PANEL", "0") == "1"
+
+logger = logging.getLogger("instrumentation")
+if TRACE_LOG and not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes():
+    """Memoria residente actual del proceso (pico si no hay /proc)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@dataclass
+class Span:
+    name: str
+    depth: int
+    cached: bool = False
+    labels: dict = field(default_factory=dict)
+    seconds: float = 0.0
+    rss_delta: int = 0
+    # "hit" / "miss" para spans cacheados
+    cache: str = None
+
+
+class Recorder:
+    """Spans de la ejecución actual (por hilo) y totales acumulados del proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # {nombre: [llamadas, segundos, máximo]} y {nombre: [aciertos, fallos]}
+        self._totals = {}
+        self._cache = {}
+
+    def _state(self):
+        if not hasattr(self._local, "spans"):
+            self._local.app = ""
+            self._local.spans = []
+            self._local.stack = []
+        return self._local
+
+    def begin_run(self, app):
+        state = self._state()
+        state.app = app
+        state.spans = []
+        state.stack = []
+
+    def run_spans(self):
+        return list(self._state().spans)
+
+    @contextmanager
+    def span(self, name, cached=False, **labels):
+        state = self._state()
+        current = Span(name, depth=len(state.stack), cached=cached, labels=labels)
+        state.spans.append(current)
+        state.stack.append(current)
+        rss = rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            current.seconds = time.perf_counter() - start
+            current.rss_delta = rss_bytes() - rss
+            state.stack.pop()
+            if cached:
+                current.cache = current.cache or "hit"
+                self.cache_event(name, current.cache == "hit")
+            with self._lock:
+                totals = self._totals.setdefault(name, [0, 0.0, 0.0])
+                totals[0] += 1
+                totals[1] += current.seconds
+                totals[2] = max(totals[2], current.seconds)
+            if TRACE_LOG:
+                logger.info(json.dumps({
+                    "app": state.app,
+                    "span": name,
+                    "seconds": round(current.seconds, 6),
+                    "rss_delta": current.rss_delta,
+                    "cache": current.cache,
+                    **labels,
+                }))
+
+    def cache_miss(self):
+        """Marca como fallo el span cacheado más interno de la ejecución actual."""
+        for current in reversed(self._state().stack):
+            if current.cached:
+                current.cache = "miss"
+                return
+
+    def cache_event(self, name, hit):
+        with self._lock:
+            counts = self._cache.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def prometheus(self):
+        """Totales del proceso en formato de texto de Prometheus."""
+        with self._lock:
+            totals = dict(self._totals)
+            cache = dict(self._cache)
+
+        lines = [
+            "# HELP app_span_seconds_total Tiempo acumulado por span.",
+            "# TYPE app_span_seconds_total counter",
+        ]
+        lines += [f'app_span_seconds_total{{span="{n}"}} {t[1]:.6f}' for n, t in sorted(totals.items())]
+        lines += ["# HELP app_span_calls_total Ejecuciones por span.", "# TYPE app_span_calls_total counter"]
+        lines += [f'app_span_calls_total{{span="{n}"}} {t[0]}' for n, t in sorted(totals.items())]
+        lines += ["# HELP app_span_seconds_max Ejecución más lenta por span.", "# TYPE app_span_seconds_max gauge"]
+        lines += [f'app_span_seconds_max{{span="{n}"}} {t[2]:.6f}' for n, t in sorted(totals.items())]
+        lines += ["# HELP app_cache_requests_total Aciertos y fallos por caché.", "# TYPE app_cache_requests_total counter"]
+        for n, (hits, misses) in sorted(cache.items()):
+            lines.append(f'app_cache_requests_total{{cache="{n}",result="hit"}} {hits}')
+            lines.append(f'app_cache_requests_total{{cache="{n}",result="miss"}} {misses}')
+        lines += ["# HELP app_rss_bytes Memoria residente del proceso.", "# TYPE app_rss_bytes gauge"]
+        lines.append(f"app_rss_bytes {rss_bytes()}")
+        return "\n".join(lines) + "\n"
+
+
+_recorder = Recorder()
+
+begin_run = _recorder.begin_run
+span = _recorder.span
+cache_miss = _recorder.cache_miss
+cache_event = _recorder.cache_event
+run_spans = _recorder.run_spans
+prometheus_text = _recorder.prometheus
+
+
+def write_metrics(path=METRICS_FILE):
+    """Escribe el texto Prometheus de forma atómica (si hay ruta configurada)."""
+    if not path:
+        return
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as fh:
+        fh.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+def debug_panel_enabled():
+    import streamlit as st
+
+    return DEBUG_PANEL or st.query_params.get("debug") == "1"
+
+
+def render_debug_panel():
+    """Desglose de la ejecución actual en la barra lateral."""
+    import pandas as pd
+    import streamlit as st
+
+    spans = run_spans()
+    with st.sidebar.expander("⏱️ Perfil de esta ejecución", expanded=True):
+        if not spans:
+            st.caption("Sin spans registrados.")
+        else:
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        "span": "  " * s.depth + s.name,
+                        "ms": round(s.seconds * 1000, 1),
+                        "ΔRSS MB": round(s.rss_delta / 1024 ** 2, 1),
+                        "caché": s.cache or "",
+                    }
+                    for s in spans
+                ]),
+                hide_index=True,
+                use_container_width=True,
+            )
+            top_level = sum(s.seconds for s in spans if s.depth == 0)
+            st.caption(f"Total medido: {top_level * 1000:,.0f} ms · RSS {rss_bytes() / 1024 ** 2:,.0f} MB")
+        st.code(prometheus_text(), language="text")
+
+
+def end_run():
+    """Cierra la ejecución: exporta métricas y, si está activo, dibuja el panel."""
+    write_metrics()
+    if debug_panel_enabled():
+        render_debug_panel()
+
+
+@contextmanager
+def instrumented_run(app):
+    """`begin_run` + cuerpo de la página + `end_run`, aunque el cuerpo salga antes.
+
+    Tras `st.stop()`/`st.rerun()` Streamlit ya no acepta elementos: sólo se
+    exportan las métricas (para ver también el panel, usar `stop_run`). Ante
+    un error, el panel sí se dibuja y el error se propaga.
+    """
+    begin_run(app)
+    try:
+        yield
+    except Exception:
+        end_run()
+        raise
+    except BaseException:
+        # Excepciones de control de Streamlit (StopException, RerunException)
+        write_metrics()
+        raise
+    else:
+        end_run()
+
+
+def stop_run():
+    """`end_run` y después `st.stop()`: la ejecución cortada también muestra su panel."""
+    import streamlit as st
+
+    end_run()
+    st.stop()
@@ -1,17 +1,45 @@
+import os
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 
+from eda import EdaArtifacts
+from instrumentation import cache_miss
+from model_store import ModelStore
+from scoring import Scorer
+from search import SEARCH_PARAMS, run_search
+
+DATA_URL = "https://raw.githubusercontent.com/czammar/ai_programming_foundations/refs/heads/main/data/pima_diabetes.csv"
+# Copia local del CSV: se descarga una sola vez
+DATA_FILE = Path(os.environ.get("PIMA_DATA_FILE", Path(__file__).resolve().parents[2] / "data" / "reference" / "pima_diabetes.csv"))
+
+CLEAN_COLUMNS = ["Glucose", "BloodPressure", "SkinThickness", "Insulin", "BMI"]
+
+MODEL_PARAMS = {"solver": "liblinear", "random_state": 42, "max_iter": 1000}
+SPLIT_PARAMS = {"test_size": 0.3, "random_state": 42}
+
+# "fast": un solo ajuste con MODEL_PARAMS; "search": validación cruzada + rejilla (search.py)
+TRAINING_MODE = os.environ.get("PIMA_TRAINING", "fast")
+
+def read_raw_data():
+    """CSV original desde la copia local (se descarga si falta)."""
+    if not DATA_FILE.exists():
+        DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
+        pd.read_csv(DATA_URL).to_csv(DATA_FILE, index=False)
+    return pd.read_csv(DATA_FILE)
+
 # --- Carga de Datos (Cacheada) ---
 @st.cache_data
 def load_data():
     """Carga, limpia e imputa el Pima Indian Diabetes Dataset."""
-    data_url = "https://raw.githubusercontent.com/czammar/ai_programming_foundations/refs/heads/main/data/pima_diabetes.csv"
-    data = pd.read_csv(data_url)
+    cache_miss()
+    data = read_raw_data()
 
-    cols_to_clean = ["Glucose", "BloodPressure", "SkinThickness", "Insulin", "BMI"]
+    cols_to_clean = CLEAN_COLUMNS
     # 1. Reemplazar 0s (missing values) por NaN
     data[cols_to_clean] = data[cols_to_clean].replace(0, np.nan)
 
@@ -22,18 +50,94 @@ def load_data():
         
     return data
 
-# --- Entrenamiento del Modelo (Cacheado) ---
-@st.cache_resource 
-def train_model(data):
-    """Entrena el modelo de Regresión Logística y devuelve el modelo y los datos de prueba."""
+@st.cache_resource
+def get_model_store():
+    """Registro en disco de modelos entrenados, compartido por el proceso."""
+    return ModelStore()
+
+def split_data(data):
+    """Split estratificado de entrenamiento/prueba, el mismo en ambos modos."""
     X = data.drop("Outcome", axis=1)
     y = data["Outcome"]
-    
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.3, random_state=42, stratify=y
-    )
-    model = LogisticRegression(solver="liblinear", random_state=42, max_iter=1000)
+    return train_test_split(X, y, stratify=y, **SPLIT_PARAMS)
+
+def fit_model(data):
+    """Entrena el modelo de Regresión Logística y devuelve el modelo y los datos de prueba."""
+    X_train, X_test, y_train, y_test = split_data(data)
+    model = LogisticRegression(**MODEL_PARAMS)
     model.fit(X_train, y_train)
     
     # Devolvemos el modelo y los datos de prueba (si son necesarios)
-    return model, X_test, y_test
\ No newline at end of file
+    return model, X_test, y_test
+
+def search_model(data):
+    """Búsqueda con validación cruzada y reajuste de la mejor configuración."""
+    X_train, X_test, y_train, y_test = split_data(data)
+    search = run_search(X_train, y_train)
+    best = search["best"]
+    if best is None:
+        # Ninguna configuración completó sus folds a tiempo: parámetros por defecto
+        params = MODEL_PARAMS
+    else:
+        params = {
+            "solver": best["solver"],
+            "penalty": best["penalty"],
+            "class_weight": best["class_weight"],
+            "C": best["C"],
+            "random_state": SEARCH_PARAMS["random_state"],
+            "max_iter": SEARCH_PARAMS["max_iter"],
+        }
+    model = LogisticRegression(**params)
+    model.fit(X_train, y_train)
+    return model, X_test, y_test, {**search, "refit_params": params}
+
+# --- Entrenamiento del Modelo (Cacheado en memoria y en disco) ---
+@st.cache_resource 
+def get_model_artifact(data):
+    """Abre el modelo de estos datos e hiperparámetros desde disco; sólo entrena si no existe."""
+    cache_miss()
+    # Imputar con la media no cambia la media: las de los datos limpios son las de imputación
+    means = data[CLEAN_COLUMNS].mean().to_dict()
+    if TRAINING_MODE == "search":
+        # La versión depende de la rejilla y el presupuesto, no del resultado
+        return get_model_store().get_or_train(
+            data, {"mode": "search", **SEARCH_PARAMS}, SPLIT_PARAMS, means, lambda: search_model(data)
+        )
+    return get_model_store().get_or_train(
+        data, MODEL_PARAMS, SPLIT_PARAMS, means, lambda: fit_model(data)
+    )
+
+def train_model(data):
+    """Modelo y datos de prueba del artefacto correspondiente a `data`."""
+    artifact = get_model_artifact(data)
+    return artifact.model, artifact.X_test, artifact.y_test
+
+def get_search_results(data):
+    """Resumen de la validación cruzada del modelo de `data` (None en modo rápido)."""
+    return get_model_artifact(data).search
+
+@st.cache_resource
+def _load_evaluation(version, mtime):
+    # mtime en la clave: una actualización incremental en disco invalida la copia en memoria
+    cache_miss()
+    return get_model_store().evaluation(version)
+
+def get_evaluation(data):
+    """Evaluación precalculada del modelo de `data` (ver evaluation.py)."""
+    artifact = get_model_artifact(data)
+    store = get_model_store()
+    path = store.evaluation_path(artifact.version)
+    if not path.exists():
+        store.evaluation(artifact.version, artifact)
+    return _load_evaluation(artifact.version, path.stat().st_mtime_ns)
+
+@st.cache_resource
+def get_scorer(data):
+    """Scorer (imputación + probabilidad + clase) del modelo de `data`."""
+    return Scorer.from_artifact(get_model_artifact(data))
+
+@st.cache_resource
+def get_eda_artifacts(data):
+    """Figuras y tablas del EDA de `data`, renderizadas una vez por dataset."""
+    cache_miss()
+    return EdaArtifacts(data)
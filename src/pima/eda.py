@@ -0,0 +1,165 @@
+"""Artefactos del EDA de Pima: figuras y tablas calculadas una vez por dataset.
+
+Cada figura se dibuja con matplotlib/seaborn una sola vez, se guarda como PNG
+y las siguientes ejecuciones sólo sirven los bytes. Lo mismo para `describe()`
+y `corr()`. Todo vive en un directorio por hash del dataset, así que otro CSV
+(u otra limpieza) genera artefactos nuevos sin invalidar a mano.
+
+    data/cache/pima/eda/<hash>/<figura>.png
+    data/cache/pima/eda/<hash>/describe.csv, corr.csv
+
+Con datasets mucho mayores que el CSV de 768 filas el costo queda acotado:
+los histogramas siguen usando todas las filas (agrupar en bins es lineal),
+pero las KDE y el pair plot se calculan sobre una muestra estratificada por
+`Outcome` de a lo más `SAMPLE_ROWS` filas.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from instrumentation import cache_miss
+
+EDA_DIR = Path(os.environ.get("PIMA_EDA_DIR", Path(__file__).resolve().parents[2] / "data" / "cache" / "pima" / "eda"))
+
+# Filas a partir de las cuales KDE y pair plot usan una muestra
+SAMPLE_ROWS = 2_000
+SAMPLE_SEED = 42
+
+PAIRPLOT_COLUMNS = ["Glucose", "BloodPressure", "SkinThickness", "Insulin", "BMI"]
+PALETTE = {0: "#3498db", 1: "#e74c3c"}
+
+
+def data_digest(data):
+    """Hash del contenido y las columnas de `data`."""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    digest.update(json.dumps(list(data.columns)).encode())
+    return digest.hexdigest()
+
+
+def sample_rows(data, n=SAMPLE_ROWS, seed=SAMPLE_SEED):
+    """`data` completo si cabe en `n` filas; si no, muestra estratificada por Outcome."""
+    if len(data) <= n:
+        return data
+    return data.groupby("Outcome", group_keys=False).sample(frac=n / len(data), random_state=seed)
+
+
+def png_bytes(fig):
+    """PNG de una figura de matplotlib; la figura se cierra."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+# --- Figuras ---
+
+def _outcome_histogram(data, column, title):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sample = sample_rows(data)
+    if sample is data:
+        sns.histplot(data=data, x=column, hue="Outcome", kde=True, bins=25, palette=PALETTE, ax=ax)
+    else:
+        # Barras con todas las filas y KDE de la muestra, ambas como densidad
+        sns.histplot(data=data, x=column, hue="Outcome", stat="density", bins=25, palette=PALETTE, ax=ax)
+        sns.kdeplot(data=sample, x=column, hue="Outcome", palette=PALETTE, legend=False, ax=ax)
+        title = f"{title} (KDE sobre {len(sample):,} de {len(data):,} filas)"
+    ax.set_title(title)
+    return fig
+
+
+def hist_glucose(data):
+    return _outcome_histogram(
+        data, "Glucose", "Distribución de Glucose por Outcome (0: No Diabetes, 1: Diabetes)"
+    )
+
+
+def hist_bmi(data):
+    return _outcome_histogram(data, "BMI", "Distribución de BMI por Outcome")
+
+
+def pairplot(data):
+    sample = sample_rows(data)
+    grid = sns.pairplot(sample[PAIRPLOT_COLUMNS], height=2.0, diag_kind="kde")
+    title = "Relación entre variables (Pair Plot)"
+    if sample is not data:
+        title += f" — muestra de {len(sample):,} de {len(data):,} filas"
+    grid.fig.suptitle(title, y=1.02)
+    return grid.fig
+
+
+def correlation(corr):
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(corr, annot=True, cmap="coolwarm", fmt=".2f", linewidths=0.5, ax=ax)
+    ax.set_title("Mapa de Calor de Correlación de Características")
+    return fig
+
+
+FIGURES = {
+    "hist_glucose": hist_glucose,
+    "hist_bmi": hist_bmi,
+    "pairplot": pairplot,
+}
+
+
+class EdaArtifacts:
+    """Figuras (PNG) y tablas del EDA de un dataset, en memoria y en disco.
+
+    Cada artefacto se calcula la primera vez que se pide; después se lee del
+    directorio del dataset o, dentro del mismo proceso, de memoria.
+    """
+
+    def __init__(self, data, root=EDA_DIR):
+        self.data = data
+        self.digest = data_digest(data)
+        self.dir = Path(root) / self.digest
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._memo = {}
+
+    def _write(self, name, payload):
+        fd, tmp = tempfile.mkstemp(dir=self.dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(payload)
+        os.replace(tmp, self.dir / name)
+
+    def _table(self, name, build):
+        if name not in self._memo:
+            path = self.dir / f"{name}.csv"
+            if path.exists():
+                table = pd.read_csv(path, index_col=0)
+            else:
+                cache_miss()
+                table = build()
+                self._write(path.name, table.to_csv().encode())
+            self._memo[name] = table
+        return self._memo[name]
+
+    def describe(self):
+        return self._table("describe", lambda: self.data.describe().T)
+
+    def corr(self):
+        return self._table("corr", self.data.corr)
+
+    def figure(self, name):
+        """PNG de la figura `name` (ver `FIGURES`, más "correlation")."""
+        if name not in self._memo:
+            path = self.dir / f"{name}.png"
+            if path.exists():
+                payload = path.read_bytes()
+            else:
+                cache_miss()
+                if name == "correlation":
+                    fig = correlation(self.corr())
+                else:
+                    fig = FIGURES[name](self.data)
+                payload = png_bytes(fig)
+                self._write(path.name, payload)
+            self._memo[name] = payload
+        return self._memo[name]
@@ -0,0 +1,159 @@
+"""Evaluación precalculada de una versión del modelo Pima.
+
+`Evaluation` guarda sólo conteos: matriz de confusión y un histograma fino
+de probabilidades por clase real. Todo lo que muestra la página se deriva de
+ellos (reporte de clasificación, histogramas, curva ROC muestreada a
+`ROC_POINTS` puntos), así que una evaluación se actualiza con filas
+etiquetadas nuevas sumando sus conteos, sin volver a puntuar el split de
+prueba. La tabla de las `TOP_K` filas más probables se mantiene con
+selección parcial (`np.argpartition`) sobre el top anterior más las filas
+nuevas.
+
+Se guarda junto al modelo en el registro (`evaluation.npz`).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# Resolución interna de las probabilidades (bins de ancho 1/ROC_BINS)
+ROC_BINS = 1000
+ROC_POINTS = 101
+HIST_BINS = 20
+TOP_K = 20
+CLASS_NAMES = ["No Diabetes (0)", "Diabetes (1)"]
+
+
+class Evaluation:
+    """Conteos aditivos de la evaluación de un modelo binario."""
+
+    __slots__ = ("features", "confusion", "score_counts", "top_index", "top_X", "top_y", "top_proba", "next_index")
+
+    def __init__(self, features, confusion=None, score_counts=None, top=None, next_index=None):
+        self.features = list(features)
+        self.confusion = np.zeros((2, 2), dtype=np.int64) if confusion is None else confusion
+        self.score_counts = np.zeros((2, ROC_BINS), dtype=np.int64) if score_counts is None else score_counts
+        if top is None:
+            top = (
+                np.empty(0, dtype=np.int64),
+                np.empty((0, len(self.features)), dtype=np.float64),
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.float64),
+            )
+        self.top_index, self.top_X, self.top_y, self.top_proba = top
+        # Primer id libre para filas sin índice propio (las de actualizaciones incrementales)
+        if next_index is None:
+            next_index = int(self.top_index.max()) + 1 if len(self.top_index) else self.rows
+        self.next_index = next_index
+
+    @property
+    def rows(self):
+        return int(self.confusion.sum())
+
+    def update(self, scorer, X, y, index=None):
+        """Suma las filas etiquetadas (`X` en el orden de `features`, `y` en {0, 1}).
+
+        Sin `index`, las filas reciben ids a partir de `next_index`, así que no
+        chocan con las ya evaluadas (p. ej. las etiquetas del split de prueba).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.int64)
+        if index is None:
+            index = np.arange(self.next_index, self.next_index + len(y), dtype=np.int64)
+        else:
+            index = np.asarray(index, dtype=np.int64)
+        if len(index):
+            self.next_index = max(self.next_index, int(index.max()) + 1)
+        proba, label = scorer.score(X)
+
+        self.confusion += np.bincount(2 * y + label, minlength=4).reshape(2, 2)
+        bins = np.minimum((proba * ROC_BINS).astype(np.int64), ROC_BINS - 1)
+        self.score_counts += np.bincount(y * ROC_BINS + bins, minlength=2 * ROC_BINS).reshape(2, ROC_BINS)
+
+        # Top-k de la unión = top-k de (top anterior + filas nuevas)
+        top_proba = np.concatenate([self.top_proba, proba])
+        keep = np.arange(len(top_proba))
+        if len(top_proba) > TOP_K:
+            keep = np.argpartition(-top_proba, TOP_K - 1)[:TOP_K]
+        keep = keep[np.argsort(-top_proba[keep], kind="stable")]
+        self.top_index = np.concatenate([self.top_index, index])[keep]
+        self.top_X = np.concatenate([self.top_X, X])[keep]
+        self.top_y = np.concatenate([self.top_y, y])[keep]
+        self.top_proba = top_proba[keep]
+        return self
+
+    # --- Vistas derivadas de los conteos ---
+
+    def report(self):
+        """Reporte de clasificación (misma forma que `classification_report(output_dict=True)`)."""
+        tp = np.diag(self.confusion).astype(np.float64)
+        support = self.confusion.sum(axis=1)
+        predicted = self.confusion.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.nan_to_num(tp / predicted)
+            recall = np.nan_to_num(tp / support)
+            f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+        total = support.sum()
+        weights = support / total if total else np.zeros(2)
+        table = pd.DataFrame(
+            {"precision": precision, "recall": recall, "f1-score": f1, "support": support},
+            index=CLASS_NAMES,
+        )
+        accuracy = tp.sum() / total if total else 0.0
+        table.loc["accuracy"] = [accuracy, accuracy, accuracy, total]
+        table.loc["macro avg"] = [precision.mean(), recall.mean(), f1.mean(), total]
+        table.loc["weighted avg"] = [precision @ weights, recall @ weights, f1 @ weights, total]
+        return table
+
+    def histograms(self, bins=HIST_BINS):
+        """(bordes, conteos por clase real) de las probabilidades en `bins` intervalos."""
+        return np.linspace(0.0, 1.0, bins + 1), self.score_counts.reshape(2, bins, -1).sum(axis=2)
+
+    def roc(self, points=ROC_POINTS):
+        """(fpr, tpr, auc): curva con `points` umbrales; el AUC usa la resolución completa."""
+        # Umbrales de mayor a menor: acumulados desde el bin más alto
+        negatives, positives = self.score_counts[:, ::-1].cumsum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fpr = np.nan_to_num(np.concatenate([[0], negatives]) / negatives[-1])
+            tpr = np.nan_to_num(np.concatenate([[0], positives]) / positives[-1])
+        auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+        keep = np.linspace(0, ROC_BINS, points).round().astype(np.int64)
+        return fpr[keep], tpr[keep], auc
+
+    def top_table(self):
+        """Filas más probables con su clase real, la predicha y si hubo error."""
+        table = pd.DataFrame(self.top_X, index=self.top_index, columns=self.features)
+        table["real_Outcome"] = self.top_y
+        table["predicted"] = (self.top_proba > 0.5).astype(np.int64)
+        table["probability (y=1)"] = self.top_proba.round(4)
+        table["Error"] = np.where(table["real_Outcome"] == table["predicted"], "Correcto", "Incorrecto")
+        return table
+
+    # --- Persistencia ---
+
+    def save(self, path):
+        # np.savez agrega .npz si falta: se escribe con nombre temporal y se renombra
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        np.savez(
+            tmp,
+            features=np.array(self.features),
+            confusion=self.confusion,
+            score_counts=self.score_counts,
+            top_index=self.top_index,
+            top_X=self.top_X,
+            top_y=self.top_y,
+            top_proba=self.top_proba,
+            next_index=np.array([self.next_index]),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["features"].tolist(),
+                data["confusion"],
+                data["score_counts"],
+                (data["top_index"], data["top_X"], data["top_y"], data["top_proba"]),
+                int(data["next_index"][0]),
+            )
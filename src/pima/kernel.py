@@ -0,0 +1,122 @@
+"""Kernel NumPy de la regresión logística, sin scikit-learn.
+
+Una predicción es un producto punto más una sigmoide. `LogisticKernel`
+guarda coeficientes, intercepto, medias de imputación y orden de columnas en
+arreglos NumPy y los exporta a un `.npz`, así que puntuar no necesita
+importar sklearn ni pasar por su validación. `score_one` resuelve una sola
+fila con floats de Python (microsegundos); `score` es la versión vectorizada.
+
+`check_parity` compara el kernel contra el modelo de sklearn del que salió;
+el registro de modelos la ejecuta al exportar cada kernel.
+"""
+import math
+
+import numpy as np
+
+THRESHOLD = 0.5
+
+
+def _sigmoid(z):
+    # Forma estable: sin overflow para |z| grandes
+    return np.exp(-np.logaddexp(0.0, -z))
+
+
+class LogisticKernel:
+    """Imputación + probabilidad + clase de un modelo logístico binario."""
+
+    __slots__ = ("features", "coef", "intercept", "means", "_imputable", "_terms")
+
+    def __init__(self, features, coef, intercept, means):
+        self.features = tuple(features)
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64).ravel()
+        self.intercept = float(np.ravel(intercept)[0])
+        # Media de imputación por feature; NaN = la feature no se imputa
+        self.means = np.asarray(means, dtype=np.float64)
+        self._imputable = ~np.isnan(self.means)
+        # (peso, media, imputable) como floats de Python para el camino de una fila
+        self._terms = tuple(
+            (w, m, imputable)
+            for w, m, imputable in zip(self.coef.tolist(), self.means.tolist(), self._imputable.tolist())
+        )
+
+    @classmethod
+    def from_model(cls, model, features, means):
+        """Kernel de un `LogisticRegression` ajustado; `means` es {feature: media}."""
+        return cls(
+            features,
+            model.coef_,
+            model.intercept_,
+            [means.get(f, np.nan) for f in features],
+        )
+
+    def impute(self, X):
+        """Ceros y faltantes de las columnas imputables -> media (en una copia)."""
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        missing = ((X == 0) | np.isnan(X)) & self._imputable
+        return np.where(missing, self.means, X)
+
+    @property
+    def required(self):
+        """Features sin media de imputación: deben venir siempre con un valor."""
+        return [f for f, imputable in zip(self.features, self._imputable.tolist()) if not imputable]
+
+    def predict_proba(self, X):
+        """Probabilidad de y=1 para cada fila de `X` (columnas en el orden de `features`).
+
+        Lanza ValueError si, tras imputar, queda algún valor no finito: una
+        feature sin imputación ausente no se puede puntuar.
+        """
+        X = self.impute(X)
+        invalid = ~np.isfinite(X).all(axis=0)
+        if invalid.any():
+            names = ", ".join(f for f, bad in zip(self.features, invalid.tolist()) if bad)
+            raise ValueError(f"Valores faltantes o no numéricos en: {names}")
+        return _sigmoid(X @ self.coef + self.intercept)
+
+    def score(self, X):
+        """(probabilidad de y=1, clase): la clase se deriva de la probabilidad."""
+        proba = self.predict_proba(X)
+        return proba, (proba > THRESHOLD).astype(np.int8)
+
+    def score_one(self, values):
+        """(probabilidad, clase) de una sola fila, sin crear arreglos."""
+        z = self.intercept
+        for feature, x, (w, m, imputable) in zip(self.features, values, self._terms):
+            if imputable and (x == 0 or x != x):
+                x = m
+            if not math.isfinite(x):
+                raise ValueError(f"Valores faltantes o no numéricos en: {feature}")
+            z += w * x
+        proba = 1.0 / (1.0 + math.exp(-z)) if z >= 0 else math.exp(z) / (1.0 + math.exp(z))
+        return proba, int(proba > THRESHOLD)
+
+    def save(self, path):
+        np.savez(
+            path,
+            features=np.array(self.features),
+            coef=self.coef,
+            intercept=np.array([self.intercept]),
+            means=self.means,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["features"].tolist(), data["coef"], data["intercept"], data["means"])
+
+
+def check_parity(kernel, model, X, atol=1e-9):
+    """Verifica que el kernel reproduce `predict_proba` y `predict` de sklearn sobre `X`."""
+    import pandas as pd
+
+    frame = pd.DataFrame(np.asarray(X, dtype=np.float64), columns=list(kernel.features))
+    expected = model.predict_proba(frame)[:, 1]
+    proba, label = kernel.score(frame.to_numpy())
+    error = float(np.max(np.abs(proba - expected))) if len(expected) else 0.0
+    if error > atol or not np.array_equal(label, model.predict(frame)):
+        raise ValueError(f"El kernel no coincide con sklearn (error máximo {error:.3e})")
+    # El camino de una fila debe dar lo mismo que el vectorizado
+    for row, p in zip(frame.to_numpy()[:32], proba[:32]):
+        if abs(kernel.score_one(row.tolist())[0] - p) > atol:
+            raise ValueError("score_one no coincide con score")
+    return error
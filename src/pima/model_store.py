@@ -0,0 +1,197 @@
+"""Registro en disco de modelos Pima entrenados.
+
+Cada modelo se guarda en un directorio cuya versión es el hash de los datos
+ya limpios, los hiperparámetros, el split de prueba y la versión de
+scikit-learn. Junto al modelo se guardan el esquema de features, las medias
+de imputación y el split de prueba. Al arrancar, la app abre el modelo de la
+versión que corresponde a sus entradas y sólo reentrena si alguna cambió.
+
+    data/models/pima/<versión>/model.joblib   modelo + split de prueba
+    data/models/pima/<versión>/kernel.npz     kernel NumPy (ver kernel.py)
+    data/models/pima/<versión>/meta.json      features, medias, parámetros
+    data/models/pima/<versión>/search.json    métricas por fold (sólo modo search)
+    data/models/pima/<versión>/evaluation.npz conteos de evaluación (ver evaluation.py)
+
+sklearn y joblib sólo se importan al entrenar o abrir el modelo completo:
+`load_kernel` basta para puntuar.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from evaluation import Evaluation
+from kernel import LogisticKernel, check_parity
+
+MODEL_DIR = Path(os.environ.get("PIMA_MODEL_DIR", Path(__file__).resolve().parents[2] / "data" / "models" / "pima"))
+
+TARGET = "Outcome"
+
+
+@dataclass(frozen=True)
+class ModelArtifact:
+    """Modelo entrenado y todo lo necesario para reproducir su evaluación."""
+
+    version: str
+    model: object
+    features: list
+    means: dict
+    params: dict
+    X_test: pd.DataFrame
+    y_test: pd.Series
+    kernel: LogisticKernel
+    # Resumen de la validación cruzada si el modelo salió de una búsqueda
+    search: dict = None
+
+
+def model_version(data, params, split):
+    """Hash de los datos, hiperparámetros, split y versión de scikit-learn."""
+    import sklearn
+
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    digest.update(json.dumps(list(data.columns)).encode())
+    digest.update(json.dumps({"params": params, "split": split, "sklearn": sklearn.__version__}, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ModelStore:
+    """Directorio de modelos versionados por el hash de sus entradas."""
+
+    def __init__(self, root=MODEL_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, version):
+        return self.root / version
+
+    def __contains__(self, version):
+        return (self._dir(version) / "meta.json").exists()
+
+    def load(self, version):
+        """El artefacto de `version`, o None si no existe."""
+        import joblib
+
+        if version not in self:
+            return None
+        meta = json.loads((self._dir(version) / "meta.json").read_text())
+        bundle = joblib.load(self._dir(version) / "model.joblib")
+        return ModelArtifact(
+            version=version,
+            model=bundle["model"],
+            features=meta["features"],
+            means=meta["means"],
+            params=meta["params"],
+            X_test=bundle["X_test"],
+            y_test=bundle["y_test"],
+            kernel=LogisticKernel.load(self._dir(version) / "kernel.npz"),
+            search=self.load_search(version),
+        )
+
+    def load_search(self, version):
+        """Resumen de la búsqueda de hiperparámetros de `version`, o None."""
+        path = self._dir(version) / "search.json"
+        return json.loads(path.read_text()) if path.exists() else None
+
+    def evaluation_path(self, version):
+        return self._dir(version) / "evaluation.npz"
+
+    def evaluation(self, version, artifact=None):
+        """Evaluación de `version`; la primera vez se calcula sobre su split de prueba."""
+        path = self.evaluation_path(version)
+        if path.exists():
+            return Evaluation.load(path)
+        artifact = artifact or self.load(version)
+        evaluation = Evaluation(artifact.features).update(
+            artifact.kernel,
+            artifact.X_test[artifact.features].to_numpy(),
+            artifact.y_test.to_numpy(),
+            artifact.X_test.index.to_numpy(),
+        )
+        evaluation.save(path)
+        return evaluation
+
+    def latest_version(self):
+        """Versión entrenada más reciente (para usos fuera de la app), o None."""
+        metas = [
+            json.loads(path.read_text())
+            for path in self.root.glob("*/meta.json")
+        ]
+        if not metas:
+            return None
+        return max(metas, key=lambda meta: meta["trained_at"])["version"]
+
+    def latest(self):
+        """El artefacto entrenado más reciente, o None."""
+        version = self.latest_version()
+        return self.load(version) if version else None
+
+    def load_kernel(self, version=None):
+        """Sólo el kernel NumPy de `version` (o del más reciente), sin importar sklearn."""
+        version = version or self.latest_version()
+        path = self._dir(version) / "kernel.npz" if version else None
+        if path is None or not path.exists():
+            return None, version
+        return LogisticKernel.load(path), version
+
+    def save(self, artifact):
+        """Escribe el artefacto en un directorio temporal y lo renombra de forma atómica."""
+        import joblib
+        import sklearn
+
+        tmp = Path(tempfile.mkdtemp(dir=self.root, suffix=".tmp"))
+        joblib.dump(
+            {"model": artifact.model, "X_test": artifact.X_test, "y_test": artifact.y_test},
+            tmp / "model.joblib",
+        )
+        artifact.kernel.save(tmp / "kernel.npz")
+        if artifact.search is not None:
+            (tmp / "search.json").write_text(json.dumps(artifact.search))
+        # meta.json al final: su presencia marca el artefacto como completo
+        (tmp / "meta.json").write_text(json.dumps({
+            "version": artifact.version,
+            "features": artifact.features,
+            "means": artifact.means,
+            "params": artifact.params,
+            "sklearn": sklearn.__version__,
+            "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }, indent=2))
+        target = self._dir(artifact.version)
+        if target.exists():
+            shutil.rmtree(tmp)
+        else:
+            os.replace(tmp, target)
+
+    def get_or_train(self, data, params, split, means, train):
+        """Modelo de la versión de estas entradas; si falta se entrena con `train()`.
+
+        `train()` devuelve (model, X_test, y_test) y, opcionalmente, el resumen
+        de la búsqueda de hiperparámetros como cuarto elemento.
+        """
+        version = model_version(data, params, split)
+        artifact = self.load(version)
+        if artifact is None:
+            model, X_test, y_test, *search = train()
+            features = [c for c in data.columns if c != TARGET]
+            kernel = LogisticKernel.from_model(model, features, means)
+            # Un kernel que no reproduce a sklearn no se guarda
+            check_parity(kernel, model, X_test[features].to_numpy())
+            artifact = ModelArtifact(
+                version=version,
+                model=model,
+                features=features,
+                means=means,
+                params=params,
+                X_test=X_test,
+                y_test=y_test,
+                kernel=kernel,
+                search=search[0] if search else None,
+            )
+            self.save(artifact)
+        return artifact
@@ -0,0 +1,370 @@
+"""Scoring por lotes y API local del modelo Pima.
+
+`Scorer` aplica la misma imputación que `load_data` (ceros y faltantes ->
+media de entrenamiento), calcula la probabilidad una sola vez y deriva la
+clase de ella (umbral 0.5, igual que `predict`). Todo pasa por el kernel
+NumPy exportado con el modelo (`kernel.py`): el CLI no importa sklearn.
+
+* `score_file`: archivos CSV/Parquet de cualquier tamaño, leídos y escritos
+  por bloques y puntuados en un pool de procesos.
+* `serve`: endpoint HTTP local (`POST /score`) que agrupa las peticiones
+  concurrentes en micro-lotes antes de puntuarlas.
+* `evaluate`: suma filas etiquetadas nuevas (con `Outcome`) a la evaluación
+  guardada del modelo, sin volver a puntuar el split de prueba.
+
+    python src/pima/scoring.py batch pacientes.parquet scores.parquet --workers 4
+    python src/pima/scoring.py serve --port 8600
+    python src/pima/scoring.py evaluate etiquetados.csv
+"""
+import argparse
+import json
+import math
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from model_store import TARGET, ModelStore
+
+CHUNK_ROWS = 250_000
+
+# Micro-lotes del endpoint: se puntúa al juntar MAX_BATCH filas o tras MAX_WAIT segundos
+MAX_BATCH = 1024
+MAX_WAIT = 0.005
+
+
+class Scorer:
+    """Imputación + probabilidad + clase de una versión del modelo."""
+
+    __slots__ = ("kernel", "features", "version")
+
+    def __init__(self, kernel, version=""):
+        self.kernel = kernel
+        self.features = list(kernel.features)
+        self.version = version
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        return cls(artifact.kernel, artifact.version)
+
+    def impute(self, X):
+        """Ceros y faltantes de las columnas imputables -> media (en una copia)."""
+        return self.kernel.impute(X)
+
+    def score(self, X):
+        """(probabilidad de y=1, clase) para una matriz con las columnas de `features`."""
+        return self.kernel.score(X)
+
+    def score_one(self, values):
+        """(probabilidad, clase) de una fila en el orden de `features`."""
+        return self.kernel.score_one(values)
+
+    def score_frame(self, df):
+        """`df` con las columnas `probability` y `prediction` añadidas.
+
+        Lanza ValueError si falta alguna feature sin imputación (ver `kernel.required`).
+        """
+        proba, label = self.score(df[self.features].to_numpy(dtype=np.float64, na_value=np.nan))
+        return df.assign(probability=proba, prediction=label)
+
+
+# --- Lotes sobre archivos ---
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    """DataFrames de hasta `chunk_rows` filas de un CSV o Parquet, sin cargar el archivo entero."""
+    path = Path(path)
+    if path.suffix.lower() == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+class _ChunkWriter:
+    """Escribe bloques en CSV o Parquet conforme llegan."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.parquet = self.path.suffix.lower() == ".parquet"
+        self._writer = None
+        self._first = True
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+_worker_scorer = None
+
+
+def _init_worker(scorer):
+    # El scorer se envía una vez por proceso, no con cada bloque
+    global _worker_scorer
+    _worker_scorer = scorer
+
+
+def _score_chunk(df):
+    return _worker_scorer.score_frame(df)
+
+
+def score_file(scorer, source, output, workers=1, chunk_rows=CHUNK_ROWS):
+    """Puntúa `source` por bloques y escribe `output`; devuelve el número de filas."""
+    writer = _ChunkWriter(output)
+    rows = 0
+    try:
+        if workers <= 1:
+            for chunk in read_chunks(source, chunk_rows):
+                writer.write(scorer.score_frame(chunk))
+                rows += len(chunk)
+            return rows
+
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(scorer,)) as pool:
+            # Como máximo 2 bloques en vuelo por proceso: memoria acotada y salida en orden
+            pending = []
+            for chunk in read_chunks(source, chunk_rows):
+                pending.append(pool.submit(_score_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    scored = pending.pop(0).result()
+                    writer.write(scored)
+                    rows += len(scored)
+            for future in pending:
+                scored = future.result()
+                writer.write(scored)
+                rows += len(scored)
+        return rows
+    finally:
+        writer.close()
+
+
+# --- API local con micro-lotes ---
+
+class MicroBatcher:
+    """Junta las filas de peticiones concurrentes y las puntúa en una sola llamada."""
+
+    def __init__(self, scorer, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.scorer = scorer
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, X):
+        """Future con (probabilidades, clases) de las filas de `X`."""
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            rows = len(items[0][0])
+            try:
+                while rows < self.max_batch:
+                    item = self._queue.get(timeout=self.max_wait)
+                    items.append(item)
+                    rows += len(item[0])
+            except queue.Empty:
+                pass
+
+            try:
+                proba, label = self.scorer.score(np.vstack([X for X, _ in items]))
+            except Exception as exc:
+                for _, future in items:
+                    future.set_exception(exc)
+                continue
+
+            start = 0
+            for X, future in items:
+                end = start + len(X)
+                future.set_result((proba[start:end], label[start:end]))
+                start = end
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def parse_records(records, features, required):
+    """Matriz de `records`; ValueError con los campos faltantes o no numéricos por registro.
+
+    Las features imputables pueden faltar o ser null (se imputan); las de
+    `required`, no.
+    """
+    rows, errors = [], []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append(f"registro {i}: no es un objeto")
+            continue
+        invalid = [
+            f for f in features
+            if (f in required or record.get(f) is not None) and not _is_number(record.get(f))
+        ]
+        if invalid:
+            errors.append(f"registro {i}: faltan o no son numéricos {', '.join(invalid)}")
+            continue
+        rows.append([np.nan if record.get(f) is None else record[f] for f in features])
+    if errors:
+        raise ValueError("; ".join(errors))
+    return np.array(rows, dtype=np.float64).reshape(len(rows), len(features))
+
+
+def _handler(batcher):
+    features = batcher.scorer.features
+    required = set(batcher.scorer.kernel.required)
+
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/health":
+                return self._reply(404, {"error": "not found"})
+            self._reply(200, {"status": "ok", "model": batcher.scorer.version, "features": features})
+
+        def do_POST(self):
+            if self.path != "/score":
+                return self._reply(404, {"error": "not found"})
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                # Un paciente ({...}) o varios ({"records": [{...}, ...]})
+                records = payload["records"] if "records" in payload else [payload]
+                if not isinstance(records, list) or not records:
+                    raise ValueError("records debe ser una lista no vacía")
+                X = parse_records(records, features, required)
+            except (ValueError, TypeError, KeyError, AttributeError) as exc:
+                return self._reply(400, {"error": str(exc)})
+
+            proba, label = batcher.submit(X).result()
+            self._reply(200, {
+                "model": batcher.scorer.version,
+                "results": [
+                    {"probability": float(p), "prediction": int(c)}
+                    for p, c in zip(proba, label)
+                ],
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return ScoringHandler
+
+
+class ScoringServer(ThreadingHTTPServer):
+    # La cola de listen por defecto (5) tira conexiones con decenas de clientes concurrentes
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def serve(scorer, host="127.0.0.1", port=8600):
+    """Sirve `POST /score` y `GET /health` hasta Ctrl+C."""
+    server = ScoringServer((host, port), _handler(MicroBatcher(scorer)))
+    print(f"Modelo {scorer.version} en http://{host}:{port}/score")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def load_scorer(version=None, store=None):
+    """Scorer de una versión del registro (o de la más reciente), sólo con su kernel."""
+    store = store or ModelStore()
+    kernel, version = store.load_kernel(version)
+    if kernel is None:
+        raise SystemExit("No hay modelos en el registro: abre la app Pima una vez para entrenarlo.")
+    return Scorer(kernel, version)
+
+
+def parse_labels(outcome, offset=0):
+    """Etiquetas de `outcome` como enteros; ValueError con las filas nulas o fuera de {0, 1}.
+
+    Las filas se numeran desde 0 a partir de `offset` (su posición en el archivo).
+    """
+    values = pd.to_numeric(pd.Series(outcome), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    invalid = np.flatnonzero(~np.isin(values, (0, 1)))
+    if len(invalid):
+        rows = ", ".join(str(offset + i) for i in invalid[:20])
+        if len(invalid) > 20:
+            rows += f" y {len(invalid) - 20} más"
+        raise ValueError(f"{TARGET} nulo o distinto de 0/1 en las filas {rows}")
+    return values.astype(np.int64)
+
+
+def update_evaluation(scorer, source, store=None, chunk_rows=CHUNK_ROWS):
+    """Suma las filas etiquetadas de `source` a la evaluación de la versión de `scorer`.
+
+    Si alguna etiqueta no es 0/1 se lanza ValueError y la evaluación guardada
+    no cambia.
+    """
+    store = store or ModelStore()
+    evaluation = store.evaluation(scorer.version)
+    offset = 0
+    for chunk in read_chunks(source, chunk_rows):
+        evaluation.update(
+            scorer,
+            chunk[scorer.features].to_numpy(dtype=np.float64, na_value=np.nan),
+            parse_labels(chunk[TARGET], offset),
+        )
+        offset += len(chunk)
+    evaluation.save(store.evaluation_path(scorer.version))
+    return evaluation
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring por lotes y API del modelo Pima.")
+    parser.add_argument("--model-version", help="Versión del registro (por defecto, la más reciente)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    batch = sub.add_parser("batch", help="Puntúa un archivo CSV o Parquet.")
+    batch.add_argument("source", type=Path)
+    batch.add_argument("output", type=Path)
+    batch.add_argument("--workers", type=int, default=1)
+    batch.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+
+    server = sub.add_parser("serve", help="Endpoint HTTP local con micro-lotes.")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=8600)
+
+    evaluate = sub.add_parser("evaluate", help="Suma filas etiquetadas a la evaluación del modelo.")
+    evaluate.add_argument("source", type=Path)
+    evaluate.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+
+    args = parser.parse_args(argv)
+    scorer = load_scorer(args.model_version)
+    if args.command == "batch":
+        rows = score_file(scorer, args.source, args.output, args.workers, args.chunk_rows)
+        print(f"{rows:,} filas puntuadas -> {args.output}")
+    elif args.command == "evaluate":
+        evaluation = update_evaluation(scorer, args.source, chunk_rows=args.chunk_rows)
+        print(f"Modelo {scorer.version}: {evaluation.rows:,} filas evaluadas")
+    else:
+        serve(scorer, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
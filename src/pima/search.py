@@ -0,0 +1,191 @@
+"""Búsqueda de hiperparámetros con validación cruzada para el modelo Pima.
+
+Modo opcional de entrenamiento (`PIMA_TRAINING=search`): k-fold estratificado
+sobre el split de entrenamiento y una rejilla de C, penalización, pesos de
+clase y solver. La unidad de trabajo es (fold, solver, penalización, pesos):
+recorre el camino de C de más a menos regularización y, con `lbfgs`, cada
+ajuste arranca de los coeficientes del anterior (`warm_start`). Las unidades
+se reparten en un pool de procesos; al agotarse `budget_s` se descarta lo
+pendiente y se elige entre las configuraciones con todos sus folds.
+
+El resultado (métricas por fold y C, la mejor configuración, tiempos) se
+guarda con el modelo en el registro (`search.json`).
+"""
+import itertools
+import multiprocessing
+import os
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+SEARCH_PARAMS = {
+    "folds": 5,
+    "C": np.logspace(-3, 2, 12).round(6).tolist(),
+    "penalty": ["l1", "l2"],
+    "class_weight": [None, "balanced"],
+    "solver": ["liblinear", "lbfgs"],
+    "scoring": "roc_auc",
+    "budget_s": 60,
+    "random_state": 42,
+    "max_iter": 1000,
+}
+
+# Penalizaciones que admite cada solver
+SOLVER_PENALTIES = {"liblinear": {"l1", "l2"}, "lbfgs": {"l2"}}
+# Solvers que reanudan desde los coeficientes previos
+WARM_START_SOLVERS = {"lbfgs"}
+
+
+def configurations(params):
+    """(solver, penalización, pesos) válidos de la rejilla."""
+    return [
+        (solver, penalty, class_weight)
+        for solver, penalty, class_weight in itertools.product(
+            params["solver"], params["penalty"], params["class_weight"]
+        )
+        if penalty in SOLVER_PENALTIES.get(solver, ())
+    ]
+
+
+_worker_data = None
+
+
+def _init_worker(X, y, folds):
+    # Datos y folds se envían una vez por proceso, no con cada unidad
+    global _worker_data
+    _worker_data = (X, y, folds)
+
+
+def _fit_path(fold, solver, penalty, class_weight, Cs, max_iter, random_state):
+    """Métricas de validación de un fold para cada C del camino."""
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+
+    X, y, folds = _worker_data
+    train, valid = folds[fold]
+    model = LogisticRegression(
+        solver=solver,
+        penalty=penalty,
+        class_weight=class_weight,
+        max_iter=max_iter,
+        random_state=random_state,
+        warm_start=solver in WARM_START_SOLVERS,
+    )
+    rows = []
+    for C in sorted(Cs):
+        model.set_params(C=C)
+        start = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", ConvergenceWarning)
+            model.fit(X[train], y[train])
+        elapsed = time.perf_counter() - start
+        proba = model.predict_proba(X[valid])[:, 1]
+        label = (proba > 0.5).astype(np.int8)
+        rows.append({
+            "solver": solver,
+            "penalty": penalty,
+            "class_weight": class_weight,
+            "C": C,
+            "fold": fold,
+            "roc_auc": float(roc_auc_score(y[valid], proba)),
+            "accuracy": float(accuracy_score(y[valid], label)),
+            "f1": float(f1_score(y[valid], label)),
+            "n_iter": int(np.max(model.n_iter_)),
+            "fit_seconds": round(elapsed, 4),
+        })
+    return rows
+
+
+def _best(results, folds, scoring):
+    """Configuración con mejor media de `scoring` entre las que completaron todos los folds."""
+    scores = {}
+    for row in results:
+        key = (row["solver"], row["penalty"], row["class_weight"], row["C"])
+        scores.setdefault(key, []).append(row[scoring])
+    complete = {key: float(np.mean(values)) for key, values in scores.items() if len(values) == folds}
+    if not complete:
+        return None
+    (solver, penalty, class_weight, C), score = max(complete.items(), key=lambda item: item[1])
+    return {"solver": solver, "penalty": penalty, "class_weight": class_weight, "C": C, scoring: score}
+
+
+def run_search(X_train, y_train, params=SEARCH_PARAMS, workers=None):
+    """Validación cruzada de la rejilla en paralelo, acotada a `params["budget_s"]`.
+
+    Devuelve el resumen serializable: `best` (None si ninguna configuración
+    completó sus folds a tiempo), `results` por fold y C, y los tiempos.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    start = time.perf_counter()
+    X = np.ascontiguousarray(X_train, dtype=np.float64)
+    y = np.asarray(y_train)
+    splitter = StratifiedKFold(params["folds"], shuffle=True, random_state=params["random_state"])
+    folds = list(splitter.split(X, y))
+
+    # Por configuración y luego por fold: las primeras configuraciones terminan completas
+    units = [
+        (fold, *config, params["C"], params["max_iter"], params["random_state"])
+        for config in configurations(params)
+        for fold in range(params["folds"])
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(units))
+    deadline = start + params["budget_s"]
+
+    results = []
+    completed = 0
+    # spawn: el servidor de Streamlit tiene hilos y fork no es seguro
+    executor = ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(X, y, folds),
+    )
+    try:
+        pending = {executor.submit(_fit_path, *unit) for unit in units}
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                results.extend(future.result())
+                completed += 1
+    finally:
+        # Lo que no empezó se cancela; lo que corre termina en segundo plano
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return {
+        "best": _best(results, params["folds"], params["scoring"]),
+        "results": results,
+        "units_completed": completed,
+        "units_total": len(units),
+        "timed_out": completed < len(units),
+        "workers": workers,
+        "elapsed_s": round(time.perf_counter() - start, 3),
+    }
+
+
+def leaderboard(search, top=10):
+    """Media y desviación por configuración de las métricas de `search`."""
+    import pandas as pd
+
+    scoring = SEARCH_PARAMS["scoring"]
+    keys = ["solver", "penalty", "class_weight", "C"]
+    table = (
+        pd.DataFrame(search["results"])
+        .groupby(keys, dropna=False)
+        .agg(
+            folds=("fold", "count"),
+            roc_auc=("roc_auc", "mean"),
+            roc_auc_std=("roc_auc", "std"),
+            accuracy=("accuracy", "mean"),
+            f1=("f1", "mean"),
+            fit_seconds=("fit_seconds", "sum"),
+        )
+        .reset_index()
+    )
+    return table.nlargest(top, scoring).round(4)
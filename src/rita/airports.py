@@ -0,0 +1,152 @@
+"""Catálogo de aeropuertos de OpenFlights con almacén local versionado.
+
+El dashboard lee los aeropuertos de un Parquet compacto (IATA, Latitude,
+Longitude) ordenado y único por IATA, validado con el SHA-256 guardado en su
+manifiesto. La descarga desde GitHub sólo ocurre con un `refresh` explícito
+o si se habilita la red (`allow_network=True` / `RITA_AIRPORTS_ONLINE=1`).
+
+    python src/rita/airports.py refresh
+    python src/rita/airports.py info
+"""
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from io import StringIO
+from pathlib import Path
+
+import polars as pl
+import requests
+
+OPENFLIGHTS_URL = "https://raw.githubusercontent.com/jpatokal/openflights/master/data/airports.dat"
+
+OPENFLIGHTS_COLUMNS = [
+    "AirportID", "Name", "City", "Country",
+    "IATA", "ICAO", "Latitude", "Longitude",
+    "Altitude", "Timezone", "DST", "TzDatabaseTimeZone",
+    "Type", "Source"
+]
+
+STORE_DIR = Path(os.environ.get("RITA_REFERENCE_DIR", Path(__file__).resolve().parents[2] / "data" / "reference"))
+STORE_FILE = "airports.parquet"
+MANIFEST_FILE = "airports.json"
+
+ALLOW_NETWORK = os.environ.get("RITA_AIRPORTS_ONLINE", "0") == "1"
+
+
+class AirportStoreError(RuntimeError):
+    """El almacén local de aeropuertos no existe o no pasa la verificación."""
+
+
+def fetch_openflights_airports(timeout=30):
+    """Descarga y limpia el dataset de aeropuertos de OpenFlights."""
+    response = requests.get(OPENFLIGHTS_URL, timeout=timeout)
+    response.raise_for_status()
+    data = StringIO(response.text)
+
+    df = pl.read_csv(
+        data,
+        has_header=False,
+        null_values="\\N",
+        ignore_errors=True,
+        infer_schema_length=20000,
+        separator=','
+    )
+
+    df = df.rename({df.columns[i]: OPENFLIGHTS_COLUMNS[i] for i in range(len(OPENFLIGHTS_COLUMNS))})
+
+    df = df.select([
+        pl.col("IATA").cast(pl.Utf8),
+        pl.col("Latitude").cast(pl.Float64),
+        pl.col("Longitude").cast(pl.Float64)
+    ]).filter(pl.col("IATA").is_not_null())
+
+    return df
+
+
+def _sha256(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def read_manifest(store_dir=STORE_DIR):
+    """Devuelve el manifiesto del almacén o None si no existe."""
+    path = Path(store_dir) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def refresh_airport_store(store_dir=STORE_DIR, timeout=30):
+    """Descarga OpenFlights y reescribe el almacén local y su manifiesto."""
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    # Una fila por IATA: evita que las uniones multipliquen vuelos
+    df = (
+        fetch_openflights_airports(timeout=timeout)
+        .unique(subset="IATA", keep="first", maintain_order=True)
+        .sort("IATA")
+    )
+
+    tmp = store_dir / (STORE_FILE + ".tmp")
+    df.write_parquet(tmp, compression="zstd", statistics=True)
+    sha256 = _sha256(tmp)
+
+    manifest = {
+        "version": sha256[:12],
+        "sha256": sha256,
+        "rows": df.height,
+        "source": OPENFLIGHTS_URL,
+        "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    os.replace(tmp, store_dir / STORE_FILE)
+    (store_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2) + "\n")
+    return manifest
+
+
+def load_airport_store(store_dir=STORE_DIR, allow_network=ALLOW_NETWORK, verify=True):
+    """Carga el catálogo de aeropuertos desde el almacén local (sin red por defecto)."""
+    store_dir = Path(store_dir)
+    path = store_dir / STORE_FILE
+
+    if not path.exists():
+        if not allow_network:
+            raise AirportStoreError(
+                f"No existe {path}. Ejecuta `python src/rita/airports.py refresh` "
+                "o habilita la red con RITA_AIRPORTS_ONLINE=1."
+            )
+        refresh_airport_store(store_dir)
+
+    if verify:
+        manifest = read_manifest(store_dir)
+        if manifest is None or manifest["sha256"] != _sha256(path):
+            raise AirportStoreError(
+                f"El checksum de {path} no coincide con {MANIFEST_FILE}. "
+                "Ejecuta `python src/rita/airports.py refresh`."
+            )
+
+    return pl.read_parquet(path)
+
+
+def airport_store_version(store_dir=STORE_DIR):
+    """Versión (prefijo del SHA-256) del almacén local, o cadena vacía."""
+    manifest = read_manifest(store_dir)
+    return manifest["version"] if manifest else ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Almacén local de aeropuertos OpenFlights.")
+    parser.add_argument("command", choices=["refresh", "info"])
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "refresh":
+        manifest = refresh_airport_store(args.store_dir)
+    else:
+        manifest = read_manifest(args.store_dir)
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,161 +1,284 @@
 import streamlit as st
 import polars as pl
-import requests
-from io import StringIO
 import plotly.express as px
 import pandas as pd
 import math # Necesario para el cálculo de promedios
+import sys
+import time
+from pathlib import Path
+
+# src/ en el path: módulos compartidos entre dashboards (instrumentation)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from airports import AirportStoreError, airport_store_version, load_airport_store
+from cache import FlightCache, file_digest
+from codes import AirportIndex
+from dataset import FrameDataset, RitaDataset, discover_partitions, partitions_token
+from jobs import JobRunner, precomputed_cube, read_status
+from manifest import PartitionManifest
+from metrics import merged_summary
+from registry import shared_registry
+from instrumentation import cache_event, cache_miss, instrumented_run, span, stop_run
+
+DEFAULT_DATA_DIR = Path(__file__).resolve().parents[2] / "data"
 
 st.set_page_config(page_title="Rutas Aéreas RITA", layout="wide")
 st.title("✈️ Análisis de Rutas Aéreas – RITA + OpenFlights")
-st.markdown("Carga tu archivo CSV RITA aquí para habilitar el análisis y las métricas.")
+st.markdown("Carga tu archivo CSV RITA (o un directorio de datos mensuales) para habilitar el análisis y las métricas.")
 
 # --- Funciones de Carga y Procesamiento ---
 
 @st.cache_data(show_spinner=True)
 def load_openflights_airports():
-    """Carga y limpia el dataset de aeropuertos de OpenFlights."""
-    url = "https://raw.githubusercontent.com/jpatokal/openflights/master/data/airports.dat"
-    colnames = [
-        "AirportID", "Name", "City", "Country",
-        "IATA", "ICAO", "Latitude", "Longitude",
-        "Altitude", "Timezone", "DST", "TzDatabaseTimeZone",
-        "Type", "Source"
-    ]
-    
-    response = requests.get(url)
-    data = StringIO(response.text)
-    
-    df = pl.read_csv(
-        data,
-        has_header=False,
-        null_values="\\N",
-        ignore_errors=True,
-        infer_schema_length=20000,
-        separator=','
-    )
-    
-    df = df.rename({df.columns[i]: colnames[i] for i in range(len(colnames))})
-    
-    df = df.select([
-        pl.col("IATA").cast(pl.Utf8),
-        pl.col("Latitude").cast(pl.Float64),
-        pl.col("Longitude").cast(pl.Float64)
-    ]).filter(pl.col("IATA").is_not_null())
-    
-    return df
+    """Carga el catálogo de aeropuertos desde el almacén local (Parquet)."""
+    cache_miss()
+    return load_airport_store()
 
-@st.cache_data(show_spinner=True)
-def process_rita_data(uploaded_file, airports_df):
+@st.cache_resource
+def get_airport_index(_airports_df, version):
+    """Índice global de aeropuertos (Enum IATA + coordenadas), uno por versión."""
+    return AirportIndex(_airports_df, version)
+
+@st.cache_resource
+def get_flight_cache():
+    """Caché en disco compartida por todas las sesiones del proceso."""
+    return FlightCache(tag=airport_store_version())
+
+@st.cache_resource
+def get_manifest():
+    """Manifiesto de particiones ya procesadas (cubos por mes en disco)."""
+    return PartitionManifest()
+
+@st.cache_resource
+def get_job_runner():
+    """Pool de procesos para precalcular datasets sin bloquear el servidor."""
+    return JobRunner()
+
+def upload_digest(uploaded_file):
+    """Hash del archivo subido, calculado una sola vez por archivo."""
+    digests = st.session_state.setdefault('rita_digests', {})
+    if uploaded_file.file_id not in digests:
+        with span("upload_digest"):
+            digests[uploaded_file.file_id] = file_digest(uploaded_file)
+    return digests[uploaded_file.file_id]
+
+def process_rita_data(uploaded_file, airports, digest):
     """Carga el archivo RITA, lo une con aeropuertos y prepara para análisis."""
-    df = pl.read_csv(uploaded_file, infer_schema_length=50000)
-
-    # Optimización: Reducir tamaño del DataFrame de Polars antes de uniones
-    rename_map = {
-        "Origin": "IATA_ORIGIN",
-        "Dest": "IATA_DEST",
-        "Reporting_Airline": "AIRLINE",
-        "FlightDate": "FlightDate" 
-    }
-    
-    cols_to_keep = list(set(rename_map.keys()) | set(["FlightDate"])) 
-    df = df.select(cols_to_keep)
-    df = df.rename(rename_map)
-
-    # --- CORRECCIÓN DE FECHAS (Dos pasos) ---
-    df = df.with_columns(
-        pl.col("FlightDate").str.strptime(pl.Date, strict=False).alias("FlightDate")
-    )
+    # Ingesta lazy (sólo Origin, Dest, Reporting_Airline y FlightDate) o acierto en caché
+    cache = get_flight_cache()
+    cache_event("flight_cache", cache.key(digest) in cache)
+    with span("process_rita_data"):
+        return cache.get_or_build(uploaded_file, airports, digest=digest)
 
-    df = df.with_columns([
-        pl.col("FlightDate").dt.year().alias("Year"),
-        pl.col("FlightDate").dt.month().alias("Month")
-    ])
-    # ----------------------------------------
-
-    # Unir con datos de aeropuertos
-    df = df.join(
-        airports_df.rename({"IATA": "IATA_ORIGIN", "Latitude": "OriginLat", "Longitude": "OriginLon"}),
-        on="IATA_ORIGIN",
-        how="left"
-    )
+def use_shared_dataset(token, build):
+    """Guarda en la sesión sólo un handle al dataset compartido del proceso."""
+    def build_counted():
+        cache_miss()
+        return build()
 
-    df = df.join(
-        airports_df.rename({"IATA": "IATA_DEST", "Latitude": "DestLat", "Longitude": "DestLon"}),
-        on="IATA_DEST",
-        how="left"
-    )
+    handle = st.session_state.get('rita_dataset')
+    if handle is None or handle.token != token:
+        with span("dataset_registry", cached=True):
+            st.session_state['rita_dataset'] = shared_registry().acquire(token, build_counted)
+    return shared_registry().get(st.session_state['rita_dataset'])
 
-    # Filtrar nulos esenciales
-    df = df.drop_nulls(["OriginLat", "OriginLon", "DestLat", "DestLon", "FlightDate"])
-    
-    return df
+def session_dataset():
+    """Dataset que la sesión usa ahora (None si no hay)."""
+    handle = st.session_state.get('rita_dataset')
+    return shared_registry().get(handle) if handle is not None else None
 
 # --- Ejecución Principal ---
 
-airports_df = load_openflights_airports()
-
-uploaded_file = st.file_uploader("Sube el archivo CSV RITA", type=["csv"])
-
-if uploaded_file:
-    # Procesar el archivo subido y almacenar el DataFrame enriquecido
-    with st.spinner("Procesando y enriqueciendo datos de vuelos..."):
-        full_df = process_rita_data(uploaded_file, airports_df)
-    
-    if full_df.is_empty():
-        st.error("No se encontraron vuelos válidos después de la limpieza y el enriquecimiento de datos.")
-        if 'flight_data' in st.session_state:
-            del st.session_state['flight_data']
-        st.stop()
-
-    st.session_state['flight_data'] = full_df
-    
-    st.success("✅ Datos cargados y listos. Ahora puedes usar el menú lateral (si está presente) o continuar con el análisis.")
-    
-    st.write("### Resumen de Vuelos Cargados")
-    st.dataframe(
-        full_df.select([
-            "FlightDate", "Year", "Month", 
-            "IATA_ORIGIN", "IATA_DEST", "AIRLINE",
-            "OriginLat", "DestLat"
-        ]).head().to_pandas()
-    )
-    
-    # ===================================================
-    #   CÁLCULO Y DISPLAY DE MÉTRICAS (REEMPLAZANDO EL GRÁFICO)
-    # ===================================================
-    st.subheader("📊 Métricas Globales del Dataset Cargado")
-    
-    # 1. Conteo total de vuelos
-    total_vuelos = len(full_df)
-    
-    # 2. Conteo de días únicos (para el promedio diario)
-    num_dias = full_df["FlightDate"].n_unique()
-    
-    # 3. Promedio de vuelos por día
-    promedio_diario = total_vuelos / num_dias if num_dias > 0 else 0
-    
-    col_m1, col_m2, col_m3 = st.columns(3)
-    
-    col_m1.metric(
-        "✈️ Vuelos Totales", 
-        f"{total_vuelos:,}",
-        help="Número total de vuelos en todo el dataset cargado."
-    )
-    
-    col_m2.metric(
-        "📅 Promedio Diario", 
-        f"{promedio_diario:.2f}",
-        help="Promedio de vuelos por día de operación."
-    )
-    
-    col_m3.metric(
-        "🗓️ Días de Operación",
-        f"{num_dias:,}",
-        help="Días únicos de operación registrados."
+with instrumented_run("rita"):
+    try:
+        with span("load_openflights_airports", cached=True):
+            airports_df = load_openflights_airports()
+    except AirportStoreError as exc:
+        st.error(f"No se pudo cargar el catálogo de aeropuertos: {exc}")
+        stop_run()
+
+    airports = get_airport_index(airports_df, airport_store_version())
+
+    modo_carga = st.radio(
+        "Origen de los datos",
+        ["Subir CSV", "Directorio de datos"],
+        horizontal=True,
+        help="El modo directorio lee sólo los meses que pide cada página."
     )
 
-else:
-    if 'flight_data' in st.session_state:
-        del st.session_state['flight_data']
-    st.info("Sube el CSV para habilitar el análisis de rutas.")
\ No newline at end of file
+    uploaded_file = None
+    extra_files = []
+    if modo_carga == "Subir CSV":
+        uploaded_file = st.file_uploader("Sube el archivo CSV RITA", type=["csv"])
+        extra_files = st.file_uploader(
+            "Añadir meses (CSV)",
+            type=["csv"],
+            accept_multiple_files=True,
+            help="Sólo se procesan los meses nuevos; los ya cargados se reutilizan."
+        )
+        en_segundo_plano = st.checkbox(
+            "Procesar en segundo plano",
+            value=True,
+            help="El archivo se procesa en otro proceso (cubo y mapas de cada mes) y esta página muestra el avance."
+        )
+
+    if modo_carga == "Directorio de datos":
+        data_dir = st.text_input(
+            "Directorio con archivos RITA mensuales (CSV, ZIP o Parquet year=/month=)",
+            value=str(DEFAULT_DATA_DIR)
+        )
+        partitions = discover_partitions(data_dir)
+
+        if not partitions:
+            st.error(f"No se encontraron archivos RITA mensuales en `{data_dir}`.")
+            if 'rita_dataset' in st.session_state:
+                del st.session_state['rita_dataset']
+            stop_run()
+
+        # Si la sesión ya tenía este directorio, los meses sin cambios se reutilizan
+        previous = session_dataset()
+        if isinstance(previous, RitaDataset) and previous.airports is airports:
+            build = lambda: previous.with_partitions(partitions)
+        else:
+            build = lambda: RitaDataset(partitions, airports, cache=get_flight_cache(), manifest=get_manifest())
+        dataset = use_shared_dataset(f"dir-{partitions_token(partitions)}-{airports.version}", build)
+
+        st.success("✅ Directorio indexado. Cada página cargará sólo el Año/Mes que selecciones.")
+
+        st.write("### Particiones Disponibles")
+        manifest = get_manifest()
+        rows = []
+        for key, path in sorted(dataset.partitions.items()):
+            # Vuelos del manifiesto si el mes ya se procesó desde este mismo archivo
+            entry = manifest.entry(key)
+            processed = entry is not None and entry["source"] == str(path)
+            rows.append({
+                "Year": key[0],
+                "Month": key[1],
+                "Archivo": path.name,
+                "Vuelos": entry["flights"] if processed else None,
+            })
+        st.dataframe(pl.DataFrame(rows).to_pandas())
+
+        # Hashes, vuelos enriquecidos y retrasos de todos los meses, en paralelo
+        if st.button("⚙️ Precalcular todos los meses en segundo plano"):
+            st.session_state['rita_partition_jobs'] = get_job_runner().submit_partitions(partitions, airports.version)
+
+        partition_jobs = st.session_state.get('rita_partition_jobs', {})
+        if partition_jobs:
+            statuses = [read_status(job) or {} for job in partition_jobs.values()]
+            terminados = sum(status.get("state") == "done" for status in statuses)
+            fallidos = sum(status.get("state") == "failed" for status in statuses)
+            st.progress(
+                terminados / len(statuses),
+                text=f"Meses precalculados: {terminados} de {len(statuses)}" + (f" · {fallidos} con error" if fallidos else "")
+            )
+
+    elif uploaded_file:
+        # Procesar el archivo subido sólo si ningún otro usuario lo cargó ya en este proceso
+        digest = upload_digest(uploaded_file)
+        token = f"{digest}-{airports.version}"
+        extras = [(extra, upload_digest(extra)) for extra in extra_files or []]
+        final_token = token + "".join(f"+{extra_digest[:12]}" for _, extra_digest in extras)
+
+        base_token = token
+        dataset = session_dataset()
+        if dataset is None or dataset.token != final_token:
+            base_cube = None
+            if en_segundo_plano:
+                # El trabajo corre en otro proceso; esta ejecución sólo consulta su avance
+                status = get_job_runner().submit_upload(uploaded_file, digest, token)
+                if status["state"] == "failed":
+                    st.error(f"Falló el procesamiento en segundo plano:\n\n{status.get('error')}")
+                    # Un trabajo fallido no se reintenta solo en cada ejecución
+                    if st.button("🔁 Reintentar"):
+                        get_job_runner().submit_upload(uploaded_file, digest, token, retry=True)
+                        st.rerun()
+                    stop_run()
+                if "cube" not in status["ready"]:
+                    st.progress(status["progress"], text=f"⏳ {status['stage']}...")
+                    time.sleep(1)
+                    st.rerun()
+                # Vuelos ya en la caché en disco y cubo precalculado: sólo se abren
+                base_cube = precomputed_cube(token)
+
+            with st.spinner("Procesando y enriqueciendo datos de vuelos..."):
+                dataset = use_shared_dataset(
+                    token,
+                    lambda: FrameDataset(
+                        process_rita_data(uploaded_file, airports, digest), airports,
+                        token=token, digest=digest, cube=base_cube,
+                    ),
+                )
+                # Cada mes añadido sólo enriquece su archivo y se fusiona con lo ya cargado
+                for extra, extra_digest in extras:
+                    token = f"{token}+{extra_digest[:12]}"
+                    dataset = use_shared_dataset(
+                        token,
+                        lambda base=dataset, extra=extra, extra_digest=extra_digest, token=token: base.append(
+                            process_rita_data(extra, airports, extra_digest), token=token, digest=extra_digest
+                        ),
+                    )
+        full_df = dataset.df
+
+        if full_df.is_empty():
+            st.error("No se encontraron vuelos válidos después de la limpieza y el enriquecimiento de datos.")
+            if 'rita_dataset' in st.session_state:
+                del st.session_state['rita_dataset']
+            stop_run()
+
+        st.success("✅ Datos cargados y listos. Ahora puedes usar el menú lateral (si está presente) o continuar con el análisis.")
+
+        job_status = read_status(base_token) if en_segundo_plano else None
+        if job_status is not None and job_status["state"] == "running":
+            mapas = sum(item.startswith("map:") for item in job_status["ready"])
+            st.progress(
+                job_status["progress"],
+                text=f"🗺️ Precalculando el mapa de cada mes: {mapas} listos (los demás se construyen al abrirlos)."
+            )
+
+        # KPIs desde los totales por mes (se fusionan al añadir meses)
+        summary = merged_summary(dataset.totals, full_df.head(5))
+
+        st.write("### Resumen de Vuelos Cargados")
+        # Las coordenadas se leen del índice de aeropuertos sólo para la vista previa
+        st.dataframe(
+            airports.with_coordinates(summary.preview)
+            .select([
+                "FlightDate", "Year", "Month", 
+                "IATA_ORIGIN", "IATA_DEST", "AIRLINE",
+                "OriginLat", "DestLat"
+            ])
+            .with_columns(pl.col(["IATA_ORIGIN", "IATA_DEST", "AIRLINE"]).cast(pl.Utf8))
+            .to_pandas()
+        )
+
+        # ===================================================
+        #   CÁLCULO Y DISPLAY DE MÉTRICAS (REEMPLAZANDO EL GRÁFICO)
+        # ===================================================
+        st.subheader("📊 Métricas Globales del Dataset Cargado")
+
+        col_m1, col_m2, col_m3 = st.columns(3)
+
+        col_m1.metric(
+            "✈️ Vuelos Totales", 
+            f"{summary.total_flights:,}",
+            help="Número total de vuelos en todo el dataset cargado."
+        )
+
+        col_m2.metric(
+            "📅 Promedio Diario", 
+            f"{summary.avg_daily:.2f}",
+            help="Promedio de vuelos por día de operación."
+        )
+
+        col_m3.metric(
+            "🗓️ Días de Operación",
+            f"{summary.num_days:,}",
+            help="Días únicos de operación registrados."
+        )
+
+    else:
+        if 'rita_dataset' in st.session_state:
+            del st.session_state['rita_dataset']
+        st.info("Sube el CSV para habilitar el análisis de rutas.")
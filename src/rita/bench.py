@@ -0,0 +1,335 @@
+"""Benchmarks del pipeline RITA sobre datos sintéticos, sin red.
+
+Genera un CSV mensual con el esquema de BTS (aeropuertos y aerolíneas con una
+distribución tipo Zipf, como en los datos reales) y mide cada etapa con el
+mismo código que usa el dashboard:
+
+* `ingest`: lectura del CSV (`scan_rita`).
+* `join`: enriquecimiento con el índice de aeropuertos (`enrich_flights`).
+* `index`: ordenamiento e índices del dataset (`FrameDataset`).
+* `filter`: selección Año/Mes/Origen sobre el cubo.
+* `aggregate`: métricas de la página de rutas (`route_metrics`).
+* `routes`: rutas con coordenadas y color (`routes_for_map`).
+* `map`: nivel de detalle, mapa GeoJSON y serialización a HTML.
+
+Cada tamaño corre en su propio proceso para que el pico de RSS sea el suyo.
+Los resultados se agregan a un historial JSON para comparar versiones:
+
+    python src/rita/bench.py suite --sizes 1M 10M 100M
+    python src/rita/bench.py compare
+"""
+import argparse
+import calendar
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from cache import CACHE_DIR
+from codes import AirportIndex
+from dataset import FrameDataset
+from ingest import RITA_SCHEMA, enrich_flights, scan_rita
+from map_render import build_route_map, level_of_detail, render_html, routes_for_map
+from metrics import route_metrics
+
+BENCH_DIR = Path(__file__).resolve().parents[2] / "data" / "bench"
+HISTORY_FILE = BENCH_DIR / "history.json"
+# CSV sintéticos: regenerables, así que van a la caché y no junto a los datos
+FIXTURES_DIR = CACHE_DIR / "bench"
+
+DEFAULT_SIZES = ["1M", "10M", "100M"]
+CHUNK_ROWS = 2_000_000
+
+# Etapas más lentas que la corrida anterior por encima de este margen se marcan
+REGRESSION_THRESHOLD = 0.10
+
+# Principales aeropuertos de EE. UU. por tráfico (IATA, latitud, longitud)
+HUB_AIRPORTS = [
+    ("ATL", 33.6367, -84.4281), ("DFW", 32.8968, -97.0380), ("DEN", 39.8617, -104.6731),
+    ("ORD", 41.9786, -87.9048), ("LAX", 33.9425, -118.4081), ("CLT", 35.2140, -80.9431),
+    ("LAS", 36.0801, -115.1522), ("PHX", 33.4343, -112.0116), ("MCO", 28.4294, -81.3090),
+    ("SEA", 47.4490, -122.3093), ("MIA", 25.7932, -80.2906), ("IAH", 29.9844, -95.3414),
+    ("JFK", 40.6398, -73.7789), ("EWR", 40.6925, -74.1687), ("SFO", 37.6190, -122.3748),
+    ("FLL", 26.0726, -80.1527), ("MSP", 44.8820, -93.2218), ("LGA", 40.7772, -73.8726),
+    ("DTW", 42.2124, -83.3534), ("BOS", 42.3643, -71.0052), ("SLC", 40.7884, -111.9778),
+    ("PHL", 39.8719, -75.2411), ("BWI", 39.1754, -76.6683), ("TPA", 27.9755, -82.5332),
+    ("SAN", 32.7336, -117.1897), ("IAD", 38.9445, -77.4558), ("BNA", 36.1245, -86.6782),
+    ("MDW", 41.7860, -87.7524), ("DCA", 38.8521, -77.0377), ("AUS", 30.1945, -97.6699),
+    ("HNL", 21.3187, -157.9224), ("DAL", 32.8471, -96.8518), ("PDX", 45.5887, -122.5975),
+    ("STL", 38.7487, -90.3700), ("RDU", 35.8776, -78.7875), ("HOU", 29.6454, -95.2789),
+    ("SMF", 38.6954, -121.5908), ("MSY", 29.9934, -90.2580), ("SJC", 37.3626, -121.9291),
+    ("SAT", 29.5337, -98.4698), ("OAK", 37.7213, -122.2207), ("MCI", 39.2976, -94.7139),
+    ("RSW", 26.5362, -81.7552), ("CLE", 41.4117, -81.8498), ("IND", 39.7173, -86.2944),
+    ("PIT", 40.4915, -80.2329), ("CMH", 39.9980, -82.8919), ("CVG", 39.0488, -84.6678),
+    ("SNA", 33.6757, -117.8682), ("JAX", 30.4941, -81.6879), ("OGG", 20.8986, -156.4305),
+    ("ANC", 61.1744, -149.9964), ("BDL", 41.9389, -72.6832), ("ONT", 34.0560, -117.6012),
+    ("ABQ", 35.0402, -106.6092), ("BUR", 34.2007, -118.3587), ("MKE", 42.9472, -87.8966),
+    ("OMA", 41.3032, -95.8941), ("BOI", 43.5644, -116.2228), ("TUS", 32.1161, -110.9410),
+]
+
+# Cuota aproximada de vuelos por aerolínea reportante
+AIRLINE_SHARES = {
+    "WN": 0.19, "AA": 0.13, "DL": 0.13, "OO": 0.11, "UA": 0.10,
+    "YX": 0.05, "MQ": 0.04, "9E": 0.04, "B6": 0.04, "AS": 0.03,
+    "NK": 0.03, "OH": 0.03, "F9": 0.02, "G4": 0.02, "HA": 0.01,
+    "ZW": 0.01, "QX": 0.01, "EV": 0.01,
+}
+
+
+def parse_size(size):
+    """'10M' -> 10_000_000, '500K' -> 500_000."""
+    size = str(size).strip().upper()
+    factor = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}.get(size[-1], 1)
+    return int(float(size.rstrip("KMB")) * factor)
+
+
+def synthetic_airports():
+    """Catálogo mínimo con el formato del almacén de OpenFlights (IATA, Latitude, Longitude)."""
+    iata, lat, lon = zip(*HUB_AIRPORTS)
+    return pl.DataFrame({"IATA": iata, "Latitude": lat, "Longitude": lon})
+
+
+def _zipf_weights(n, exponent=1.1):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def synthetic_chunk(rng, rows, year=2024, month=1):
+    """Un bloque de vuelos RITA sintéticos con las columnas de `RITA_SCHEMA`."""
+    codes = pl.Series([code for code, _, _ in HUB_AIRPORTS])
+    airport_p = _zipf_weights(len(codes))
+    airlines = pl.Series(list(AIRLINE_SHARES))
+    airline_p = np.array(list(AIRLINE_SHARES.values()))
+
+    origin = rng.choice(len(codes), size=rows, p=airport_p)
+    dest = rng.choice(len(codes), size=rows, p=airport_p)
+    # Sin vuelos de un aeropuerto a sí mismo
+    same = origin == dest
+    dest[same] = (dest[same] + rng.integers(1, len(codes), size=same.sum())) % len(codes)
+
+    day = rng.integers(1, calendar.monthrange(year, month)[1] + 1, size=rows)
+
+    # Salidas entre 5:00 y 23:55, con más vuelos por la mañana y la tarde
+    hour = np.clip(rng.normal(13, 4.5, size=rows).round(), 5, 23).astype(np.int32)
+    minute = rng.integers(0, 12, size=rows, dtype=np.int32) * 5
+
+    # Retrasos: la mayoría sale a tiempo y una cola larga se retrasa
+    dep_delay = np.where(
+        rng.random(rows) < 0.2,
+        rng.exponential(45, size=rows),
+        rng.normal(-3, 6, size=rows),
+    ).round()
+    arr_delay = (dep_delay + rng.normal(-5, 9, size=rows)).round()
+    cancelled = (rng.random(rows) < 0.015).astype(np.float64)
+    diverted = ((rng.random(rows) < 0.002) & (cancelled == 0)).astype(np.float64)
+    no_arrival = (cancelled + diverted) > 0
+
+    return pl.DataFrame({
+        "Day": day,
+        "Reporting_Airline": airlines.gather(rng.choice(len(airlines), size=rows, p=airline_p / airline_p.sum())),
+        "Origin": codes.gather(origin),
+        "Dest": codes.gather(dest),
+        "CRSDepTime": hour * 100 + minute,
+        "DepDelay": np.where(cancelled > 0, np.nan, dep_delay),
+        "ArrDelay": np.where(no_arrival, np.nan, arr_delay),
+        "Cancelled": cancelled,
+        "Diverted": diverted,
+    }).with_columns([
+        pl.date(year, month, pl.col("Day")).dt.strftime("%Y-%m-%d").alias("FlightDate"),
+        pl.col(["DepDelay", "ArrDelay"]).fill_nan(None),
+    ]).select(list(RITA_SCHEMA)).cast(RITA_SCHEMA)
+
+
+def generate_rita(path, rows, seed=0, year=2024, month=1, chunk_rows=CHUNK_ROWS):
+    """Escribe un CSV RITA sintético de `rows` filas, por bloques (memoria acotada)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, "wb") as fh:
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            synthetic_chunk(rng, n, year, month).write_csv(fh, include_header=written == 0)
+            written += n
+    return path
+
+
+def dataset_path(rows, seed=0):
+    """CSV sintético de `rows` filas; se genera una sola vez y se reutiliza."""
+    # Sin el sufijo _AAAA_M: `discover_partitions` no lo confunde con un mes real
+    path = FIXTURES_DIR / f"rita_synthetic_{rows}_s{seed}.csv"
+    if not path.exists():
+        generate_rita(path, rows, seed=seed)
+    return path
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso en MB (ru_maxrss está en KB en Linux)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+class StageTimer:
+    """Tiempo y pico de RSS acumulado al terminar cada etapa."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.stages[name] = {
+            "seconds": round(time.perf_counter() - start, 4),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+
+
+def run_pipeline(path):
+    """Ejecuta las etapas del dashboard sobre un CSV y devuelve sus tiempos."""
+    timer = StageTimer()
+    airports = AirportIndex(synthetic_airports(), version="bench")
+
+    with timer.stage("ingest"):
+        raw = scan_rita(path).collect(engine="streaming")
+    with timer.stage("join"):
+        flights = enrich_flights(raw.lazy(), airports).collect(engine="streaming")
+    del raw
+    with timer.stage("index"):
+        dataset = FrameDataset(flights, airports, token="bench")
+    del flights
+
+    year, month = dataset.years()[0], dataset.months()[0]
+    with timer.stage("filter"):
+        dataset.cube(year, month, origin=dataset.origins(year, month)[0])
+        cube = dataset.cube(year, month)
+    with timer.stage("aggregate"):
+        metrics = route_metrics(cube)
+    with timer.stage("routes"):
+        route_counts, airports_unique = routes_for_map(metrics.routes, airports)
+    with timer.stage("map"):
+        routes_lod, _ = level_of_detail(route_counts)
+        html = render_html(build_route_map(routes_lod, airports_unique))
+
+    return {
+        "flights": metrics.total_flights,
+        "map_bytes": len(html),
+        "stages": timer.stages,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_history(path=HISTORY_FILE):
+    return json.loads(Path(path).read_text()) if Path(path).exists() else []
+
+
+def append_history(record, path=HISTORY_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    history = read_history(path)
+    history.append(record)
+    path.write_text(json.dumps(history, indent=2))
+
+
+def run(size, seed=0, history=HISTORY_FILE):
+    """Genera (si falta) y mide un tamaño; agrega el resultado al historial."""
+    rows = parse_size(size)
+    result = run_pipeline(dataset_path(rows, seed))
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "polars": pl.__version__,
+        "rows": rows,
+        "seed": seed,
+        **result,
+    }
+    append_history(record, history)
+    return record
+
+
+def compare(history=HISTORY_FILE, threshold=REGRESSION_THRESHOLD):
+    """Compara la última corrida de cada tamaño con la anterior."""
+    by_rows = {}
+    for record in read_history(history):
+        by_rows.setdefault(record["rows"], []).append(record)
+
+    lines = []
+    for rows, records in sorted(by_rows.items()):
+        if len(records) < 2:
+            lines.append(f"{rows:>12,} filas: una sola corrida ({records[-1]['revision']})")
+            continue
+        previous, last = records[-2], records[-1]
+        lines.append(f"{rows:>12,} filas: {previous['revision']} -> {last['revision']}")
+        for stage, current in last["stages"].items():
+            before = previous["stages"].get(stage)
+            if before is None or before["seconds"] == 0:
+                continue
+            change = current["seconds"] / before["seconds"] - 1
+            flag = "  REGRESIÓN" if change > threshold else ""
+            lines.append(
+                f"    {stage:<10} {before['seconds']:>9.3f}s -> {current['seconds']:>9.3f}s ({change:+.1%}){flag}"
+            )
+        lines.append(f"    {'peak RSS':<10} {previous['peak_rss_mb']:>8.1f}MB -> {last['peak_rss_mb']:>8.1f}MB")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline RITA con datos sintéticos.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Mide un tamaño en este proceso.")
+    run_parser.add_argument("size", help="Filas, p. ej. 1M o 500K")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--history", type=Path, default=HISTORY_FILE)
+
+    suite_parser = sub.add_parser("suite", help="Mide varios tamaños, cada uno en su propio proceso.")
+    suite_parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES)
+    suite_parser.add_argument("--seed", type=int, default=0)
+    suite_parser.add_argument("--history", type=Path, default=HISTORY_FILE)
+
+    generate_parser = sub.add_parser("generate", help="Sólo genera un CSV sintético.")
+    generate_parser.add_argument("size")
+    generate_parser.add_argument("output", type=Path)
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    compare_parser = sub.add_parser("compare", help="Compara las dos últimas corridas por tamaño.")
+    compare_parser.add_argument("--history", type=Path, default=HISTORY_FILE)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        record = run(args.size, args.seed, args.history)
+        print(json.dumps(record, indent=2))
+    elif args.command == "suite":
+        for size in args.sizes:
+            subprocess.run(
+                [sys.executable, __file__, "run", size, "--seed", str(args.seed), "--history", str(args.history)],
+                check=True,
+            )
+        print(compare(args.history))
+    elif args.command == "generate":
+        print(generate_rita(args.output, parse_size(args.size), seed=args.seed))
+    else:
+        print(compare(args.history))
+
+
+if __name__ == "__main__":
+    main()
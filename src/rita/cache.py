@@ -0,0 +1,160 @@
+"""Caché persistente en disco del dataset RITA enriquecido.
+
+Cada archivo se identifica por el hash de su contenido y el resultado del
+pipeline (fechas + códigos Enum de aeropuertos) se guarda como Arrow IPC. En un
+acierto se lee el archivo IPC en lugar de volver a procesar el CSV.
+
+Uso como CLI para pre-calentar la caché:
+
+    python src/rita/cache.py warm data/
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import polars as pl
+
+from airports import airport_store_version, load_airport_store
+from codes import AirportIndex
+from ingest import load_rita
+
+# Subir este número cuando cambien las columnas o tipos del dataset enriquecido
+CACHE_VERSION = 3
+
+CACHE_DIR = Path(os.environ.get("RITA_CACHE_DIR", Path(__file__).resolve().parents[2] / "data" / "cache"))
+DEFAULT_MAX_BYTES = int(os.environ.get("RITA_CACHE_MAX_BYTES", 5 * 1024 ** 3))
+
+CACHED_COLUMNS = [
+    "FlightDate", "Year", "Month",
+    "IATA_ORIGIN", "IATA_DEST", "AIRLINE",
+]
+
+
+def file_digest(source, chunk_size=1 << 20):
+    """Hash BLAKE2b del contenido de una ruta o buffer, leído por bloques.
+
+    Para un directorio (partición Parquet) se combinan todos sus archivos.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            with open(file, "rb") as fh:
+                for chunk in iter(lambda: fh.read(chunk_size), b""):
+                    digest.update(chunk)
+    else:
+        source.seek(0)
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            digest.update(chunk)
+        source.seek(0)
+
+    return digest.hexdigest()
+
+
+class FlightCache:
+    """Caché LRU en disco, acotada por tamaño, de DataFrames enriquecidos."""
+
+    def __init__(self, root=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, tag=""):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        # `tag` identifica los datos de referencia (p. ej. versión de aeropuertos)
+        self.tag = tag
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def key(self, digest):
+        return f"{digest}-{self.tag}-v{CACHE_VERSION}" if self.tag else f"{digest}-v{CACHE_VERSION}"
+
+    def _path(self, key):
+        return self.root / f"{key}.arrow"
+
+    def __contains__(self, key):
+        return self._path(key).exists()
+
+    def get(self, key):
+        """Devuelve el DataFrame cacheado o None."""
+        path = self._path(key)
+        if not path.exists():
+            return None
+        # El mtime hace de marca de último acceso para el desalojo LRU
+        os.utime(path)
+        return pl.read_ipc(path)
+
+    def put(self, key, df):
+        """Escribe el DataFrame de forma atómica y aplica el límite de tamaño."""
+        # Sin compresión: un acierto se lee sin descomprimir
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        os.close(fd)
+        df.select(CACHED_COLUMNS).write_ipc(tmp, compression="uncompressed")
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Elimina las entradas menos usadas hasta quedar bajo `max_bytes`.
+
+        Cuentan también los directorios de los trabajos terminados (cubo y
+        mapas precalculados), que viven bajo `jobs/`.
+        """
+        # Importación diferida: jobs depende de este módulo
+        from jobs import job_entries
+
+        entries = [(p, p.stat().st_size, p.stat().st_mtime) for p in self.root.glob("*.arrow")]
+        entries += job_entries(self.root / "jobs")
+        entries.sort(key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        # Nunca se elimina la entrada más reciente, aunque exceda el límite
+        for path, size, _ in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            total -= size
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+
+    def get_or_build(self, source, airports, digest=None):
+        """Devuelve el dataset enriquecido desde la caché o lo construye y guarda."""
+        key = self.key(digest or file_digest(source))
+        df = self.get(key)
+        if df is None:
+            self.put(key, load_rita(source, airports))
+            df = self.get(key)
+        return df
+
+
+def warm(data_dir, cache):
+    """Pre-calienta la caché con todas las particiones RITA de `data_dir`."""
+    # Importación diferida: dataset depende de este módulo
+    from dataset import discover_partitions
+
+    airports = AirportIndex(load_airport_store())
+    for (year, month), path in sorted(discover_partitions(data_dir).items()):
+        key = cache.key(file_digest(path))
+        if key in cache:
+            print(f"[hit]   {year}-{month:02d} {path}")
+            continue
+        cache.put(key, load_rita(path, airports))
+        print(f"[build] {year}-{month:02d} {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Caché en disco del dataset RITA enriquecido.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    warm_parser = sub.add_parser("warm", help="Pre-calienta la caché desde un directorio de datos RITA.")
+    warm_parser.add_argument("data_dir", nargs="?", default="data")
+    warm_parser.add_argument("--cache-dir", default=CACHE_DIR)
+    warm_parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+
+    args = parser.parse_args(argv)
+    cache = FlightCache(args.cache_dir, args.max_bytes, tag=airport_store_version())
+    if args.command == "warm":
+        warm(args.data_dir, cache)
+
+
+if __name__ == "__main__":
+    main()
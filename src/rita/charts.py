@@ -0,0 +1,69 @@
+"""Figuras de Plotly construidas directamente desde columnas de Polars.
+
+Las métricas ya llegan agregadas y compactas (top de rutas, aerolíneas, serie
+diaria), así que cada gráfica sólo toma sus columnas como arreglos de NumPy
+(sin copia para las numéricas) y arma las trazas con `plotly.graph_objects`.
+No hay conversión a pandas ni agregaciones repetidas en cada rerun.
+"""
+import plotly.graph_objects as go
+import polars as pl
+
+WEEKDAYS = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
+
+
+def columns(df, *names):
+    """Columnas de `df` como arreglos listos para una traza."""
+    return [df.get_column(name).to_numpy() for name in names]
+
+
+def _layout(fig, title, **layout):
+    fig.update_layout(title=title, margin=dict(t=60, l=10, r=10, b=10), **layout)
+    return fig
+
+
+def top_routes_chart(top_routes, title="Top 10 Rutas del Mes Filtrado"):
+    """Barras de `top_routes` (Ruta, total)."""
+    ruta, total = columns(top_routes, "Ruta", "total")
+    fig = go.Figure(go.Bar(x=ruta, y=total, text=total, textposition="auto"))
+    return _layout(fig, title, xaxis_tickangle=45, xaxis_title="Ruta", yaxis_title="total")
+
+
+def airlines_chart(airlines, title="Vuelos por Aerolínea"):
+    """Pastel de `airlines` (AIRLINE, total)."""
+    airline, total = columns(airlines, "AIRLINE", "total")
+    return _layout(go.Figure(go.Pie(labels=airline, values=total)), title)
+
+
+def daily_chart(daily, y="vuelos", title="Serie diaria del mes filtrado"):
+    """Línea con marcadores de una o varias columnas de `daily` contra FlightDate."""
+    names = [y] if isinstance(y, str) else list(y)
+    (dates,) = columns(daily, "FlightDate")
+    fig = go.Figure([
+        go.Scatter(x=dates, y=values, mode="lines+markers", name=name)
+        for name, values in zip(names, columns(daily, *names))
+    ])
+    return _layout(fig, title, xaxis_title="FlightDate", showlegend=len(names) > 1)
+
+
+def grouped_bar_chart(df, x, ys, title):
+    """Barras agrupadas: una traza por columna de `ys`."""
+    (labels,) = columns(df, x)
+    fig = go.Figure([
+        go.Bar(x=labels, y=values, name=name)
+        for name, values in zip(ys, columns(df, *ys))
+    ])
+    return _layout(fig, title, barmode="group", xaxis_title=x)
+
+
+def weekday_hour_heatmap(heatmap, z="DepDelay_mean", title=None):
+    """Matriz día de la semana × hora a partir del agregado largo (Weekday, Hour, z)."""
+    # Pivot en Polars sobre una rejilla completa 7 × 24 (celdas vacías = null)
+    grid = (
+        pl.DataFrame({"Weekday": list(range(1, 8))}, schema={"Weekday": heatmap.schema["Weekday"]})
+        .join(pl.DataFrame({"Hour": list(range(24))}, schema={"Hour": heatmap.schema["Hour"]}), how="cross")
+        .join(heatmap.select(["Weekday", "Hour", z]), on=["Weekday", "Hour"], how="left")
+        .sort(["Weekday", "Hour"])
+    )
+    matrix = grid.get_column(z).to_numpy().reshape(7, 24)
+    fig = go.Figure(go.Heatmap(z=matrix, x=list(range(24)), y=WEEKDAYS, colorscale="Reds"))
+    return _layout(fig, title or z, xaxis_title="Hora programada de salida", yaxis_autorange="reversed")
@@ -0,0 +1,97 @@
+"""Diccionarios globales (Enum) de códigos IATA y de aerolíneas.
+
+Los códigos de aeropuerto y aerolínea se guardan como `pl.Enum`: cada vuelo
+sólo lleva un entero por código y las coordenadas se obtienen del índice de
+aeropuertos con un `gather` por código físico, en lugar de unir tablas por
+cadenas y arrastrar cuatro columnas Float64 por vuelo.
+
+El Enum de aerolíneas cubre todo el espacio de designadores IATA de dos
+caracteres, no sólo el catálogo conocido: una aerolínea nueva o un código
+histórico conserva su propio código (y su color) en lugar de mezclarse con
+otras. Al ser el mismo Enum para todos los archivos, los cubos de distintos
+meses se concatenan sin reconciliar categorías.
+"""
+import hashlib
+import string
+
+import polars as pl
+
+# Aerolíneas reportantes de BTS (On-Time Performance, 1987 al presente)
+AIRLINE_CODES = [
+    "9E", "AA", "AQ", "AS", "B6", "CO", "DH", "DL", "EA", "EV",
+    "F9", "FL", "G4", "HA", "HP", "KH", "ML", "MQ", "NK", "NW",
+    "OH", "OO", "PA", "PI", "PS", "QX", "TW", "TZ", "UA", "US",
+    "VX", "WN", "XE", "YV", "YX", "ZW",
+]
+# Resto de designadores IATA posibles (dos caracteres alfanuméricos)
+OTHER_AIRLINE_CODES = sorted(
+    {a + b for a in string.ascii_uppercase + string.digits for b in string.ascii_uppercase + string.digits}
+    - set(AIRLINE_CODES)
+)
+# Código para valores que no son un designador IATA (se conservan los vuelos)
+UNKNOWN_AIRLINE = "??"
+
+AIRLINE_ENUM = pl.Enum(AIRLINE_CODES + OTHER_AIRLINE_CODES + [UNKNOWN_AIRLINE])
+
+# Paleta fija por aerolínea, en el orden del Enum. BLAKE2b (a diferencia de
+# hash()) no usa semilla por proceso: el color es el mismo en cada worker.
+AIRLINE_PALETTE = pl.Series(
+    "color",
+    [f"#{hashlib.blake2b(code.encode(), digest_size=3).hexdigest()}" for code in AIRLINE_ENUM.categories],
+)
+
+
+def encode_airline(expr):
+    """Convierte una expresión Utf8 de aerolínea al Enum global, conservando el código."""
+    return (
+        expr.str.strip_chars()
+        .str.to_uppercase()
+        .cast(AIRLINE_ENUM, strict=False)
+        .fill_null(pl.lit(UNKNOWN_AIRLINE, dtype=AIRLINE_ENUM))
+    )
+
+
+def airline_color(expr):
+    """Color de una aerolínea (Enum) vía gather sobre la paleta, sin callbacks de Python."""
+    return pl.lit(AIRLINE_PALETTE).gather(expr.to_physical())
+
+
+class AirportIndex:
+    """Aeropuertos con coordenadas indexados por el código físico del Enum IATA."""
+
+    def __init__(self, airports_df, version=""):
+        # `version` identifica el almacén de origen (para claves de caché)
+        self.version = version
+        df = (
+            airports_df.drop_nulls(["IATA", "Latitude", "Longitude"])
+            .unique(subset="IATA", keep="first")
+            .sort("IATA")
+        )
+        self.codes = df["IATA"]
+        self.dtype = pl.Enum(self.codes)
+        self.latitude = df["Latitude"]
+        self.longitude = df["Longitude"]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def encode(self, expr):
+        """Convierte códigos IATA Utf8 al Enum; los desconocidos quedan en null."""
+        return expr.cast(self.dtype, strict=False)
+
+    def lat(self, expr):
+        """Latitud de un código IATA (Enum) vía gather sobre el índice."""
+        return pl.lit(self.latitude).gather(expr.to_physical())
+
+    def lon(self, expr):
+        """Longitud de un código IATA (Enum) vía gather sobre el índice."""
+        return pl.lit(self.longitude).gather(expr.to_physical())
+
+    def with_coordinates(self, df):
+        """Agrega OriginLat/OriginLon/DestLat/DestLon a un frame ya reducido."""
+        return df.with_columns([
+            self.lat(pl.col("IATA_ORIGIN")).alias("OriginLat"),
+            self.lon(pl.col("IATA_ORIGIN")).alias("OriginLon"),
+            self.lat(pl.col("IATA_DEST")).alias("DestLat"),
+            self.lon(pl.col("IATA_DEST")).alias("DestLon"),
+        ])
@@ -0,0 +1,21 @@
+"""Cubo pre-agregado de rutas para la página de Mapa de Rutas.
+
+El cubo guarda el número de vuelos por (Year, Month, FlightDate, origen,
+destino, aerolínea). Todas las métricas, gráficas y el mapa de la página se
+responden desde él (ver `metrics.route_metrics`), sin volver a recorrer la
+tabla de vuelos.
+"""
+import polars as pl
+
+CUBE_KEYS = ["Year", "Month", "FlightDate", "IATA_ORIGIN", "IATA_DEST", "AIRLINE"]
+
+
+def build_route_cube(flights):
+    """Agrega un DataFrame/LazyFrame de vuelos enriquecidos al cubo de rutas."""
+    return (
+        flights.lazy()
+        .group_by(CUBE_KEYS)
+        .agg(pl.len().cast(pl.UInt32).alias("flights"))
+        .sort(["Year", "Month", "IATA_ORIGIN", "IATA_DEST"])
+        .collect(engine="streaming")
+    )
@@ -0,0 +1,263 @@
+"""Datasets RITA particionados por Año/Mes.
+
+Un directorio de datos (el que llenan `data/rita.sh` y `data/extract_csv.sh`)
+puede contener CSV mensuales, los ZIP originales o Parquet particionado
+(year=/month=). Cada mes se trata como una partición independiente y sólo se
+leen las particiones que pide la página.
+
+Los datasets son inmutables (se comparten entre sesiones por token). Añadir un
+mes crea un dataset nuevo que reutiliza lo ya procesado de los demás meses:
+`RitaDataset.with_partitions` conserva hashes y cubos de las particiones sin
+cambios (y el `PartitionManifest` los conserva entre procesos), y
+`FrameDataset.append` sólo ordena, indexa y agrega los vuelos nuevos.
+"""
+import copy
+import hashlib
+import re
+from pathlib import Path
+
+import polars as pl
+
+from cache import file_digest
+from cube import build_route_cube
+from index import INDEX_KEYS, SortedIndex, merge_indexes
+from ingest import enrich_flights, scan_rita
+
+# On_Time_Reporting_Carrier_On_Time_Performance_(1987_present)_2024_1.csv / .zip
+RITA_FILE_RE = re.compile(r"_(?P<year>\d{4})_(?P<month>\d{1,2})\.(?:csv|zip|parquet)$", re.IGNORECASE)
+HIVE_DIR_RE = re.compile(r"year=(?P<year>\d{4})[\\/]month=(?P<month>\d{1,2})$")
+
+# Preferencia cuando un mismo mes existe en varios formatos
+FORMAT_PRIORITY = {"": 0, ".parquet": 1, ".csv": 2, ".zip": 3}
+
+
+def discover_partitions(data_dir):
+    """Devuelve {(año, mes): ruta} con el mejor archivo disponible por mes."""
+    data_dir = Path(data_dir)
+    partitions = {}
+
+    for path in data_dir.rglob("*"):
+        if path.is_dir():
+            match = HIVE_DIR_RE.search(path.as_posix())
+        elif HIVE_DIR_RE.search(path.parent.as_posix()):
+            # Archivos dentro de una partición Hive: se usa el directorio
+            continue
+        else:
+            match = RITA_FILE_RE.search(path.name)
+        if not match:
+            continue
+
+        key = (int(match["year"]), int(match["month"]))
+        current = partitions.get(key)
+        if current is None or FORMAT_PRIORITY[path.suffix.lower()] < FORMAT_PRIORITY[current.suffix.lower()]:
+            partitions[key] = path
+
+    return partitions
+
+
+def partitions_token(partitions):
+    """Identificador barato de un conjunto de particiones (ruta, tamaño y mtime)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for key, path in sorted(partitions.items()):
+        stat = path.stat()
+        digest.update(f"{key}|{path}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def _signature(path):
+    stat = path.stat()
+    return (str(path), stat.st_size, stat.st_mtime_ns)
+
+
+def month_totals(cube):
+    """{(año, mes): (vuelos, días)} a partir de un cubo de rutas."""
+    totals = (
+        cube.group_by(["Year", "Month"])
+        .agg([
+            pl.col("flights").sum().alias("flights"),
+            pl.col("FlightDate").n_unique().alias("days"),
+        ])
+    )
+    return {(y, m): (flights, days) for y, m, flights, days in totals.rows()}
+
+
+class RitaDataset:
+    """Colección lazy de particiones mensuales sobre disco."""
+
+    def __init__(self, partitions, airports, cache=None, manifest=None):
+        self.partitions = dict(partitions)
+        self.airports = airports
+        self.cache = cache
+        self.manifest = manifest
+        self.token = partitions_token(self.partitions)
+        self._digests = {}
+        self._cubes = {}
+
+    @classmethod
+    def from_directory(cls, data_dir, airports, cache=None, manifest=None):
+        return cls(discover_partitions(data_dir), airports, cache, manifest)
+
+    def with_partitions(self, partitions):
+        """Dataset con `partitions` que reutiliza hashes y cubos de los meses sin cambios."""
+        dataset = RitaDataset(partitions, self.airports, self.cache, self.manifest)
+        for key, path in dataset.partitions.items():
+            old = self.partitions.get(key)
+            if old is None or _signature(old) != _signature(path):
+                continue
+            if key in self._digests:
+                dataset._digests[key] = self._digests[key]
+            if key in self._cubes:
+                dataset._cubes[key] = self._cubes[key]
+        return dataset
+
+    def years(self):
+        return sorted({year for year, _ in self.partitions})
+
+    def months(self, year=None):
+        return sorted({m for y, m in self.partitions if year is None or y == year})
+
+    def _selected(self, year=None, month=None):
+        return [
+            key for key in sorted(self.partitions)
+            if (year is None or key[0] == year) and (month is None or key[1] == month)
+        ]
+
+    def scan(self, year=None, month=None, columns=None):
+        """LazyFrame enriquecido que sólo abre las particiones seleccionadas."""
+        frames = [scan_rita(self.partitions[key], columns) for key in self._selected(year, month)]
+        if not frames:
+            return None
+        return enrich_flights(pl.concat(frames, how="vertical"), self.airports)
+
+    def partition_digest(self, key):
+        """Hash del contenido de una partición, calculado una sola vez."""
+        if key not in self._digests:
+            self._digests[key] = file_digest(self.partitions[key])
+        return self._digests[key]
+
+    def _load_partition(self, key):
+        path = self.partitions[key]
+        if self.cache is None:
+            return enrich_flights(scan_rita(path), self.airports).collect(engine="streaming")
+        return self.cache.get_or_build(path, self.airports, digest=self.partition_digest(key))
+
+    def load(self, year=None, month=None):
+        """DataFrame enriquecido de las particiones seleccionadas (vacío si no hay)."""
+        frames = [self._load_partition(key) for key in self._selected(year, month)]
+        if not frames:
+            return pl.DataFrame()
+        return pl.concat(frames, how="vertical")
+
+    def _build_cube(self, key):
+        if self.manifest is None:
+            return build_route_cube(self._load_partition(key))
+
+        # Partición ya registrada en el manifiesto: no se vuelve a leer
+        digest = self.partition_digest(key)
+        cube = self.manifest.load_cube(key, digest, self.airports.version)
+        if cube is None:
+            cube = build_route_cube(self._load_partition(key))
+            self.manifest.record(key, self.partitions[key], digest, self.airports.version, cube)
+        return cube
+
+    def _cube_index(self, key):
+        # El cubo y su índice se construyen una vez por partición
+        if key not in self._cubes:
+            self._cubes[key] = SortedIndex(self._build_cube(key))
+        return self._cubes[key]
+
+    def cube(self, year=None, month=None, origin=None, dest=None):
+        """Cubo de rutas de la selección (vacío si no hay particiones)."""
+        keys = self._selected(year, month)
+        if not keys:
+            return pl.DataFrame()
+        return pl.concat(
+            [self._cube_index(key).slice(*key, origin, dest) for key in keys],
+            how="vertical",
+        )
+
+    def estimated_size(self):
+        """Bytes en memoria: sólo los cubos construidos (las particiones viven en disco)."""
+        return sum(index.frame.estimated_size() for index in self._cubes.values())
+
+    def origins(self, year, month):
+        if (year, month) not in self.partitions:
+            return []
+        return self._cube_index((year, month)).origins(year, month)
+
+    def destinations(self, year, month):
+        if (year, month) not in self.partitions:
+            return []
+        return self._cube_index((year, month)).destinations(year, month)
+
+
+class FrameDataset:
+    """Misma interfaz que `RitaDataset` sobre un DataFrame ya enriquecido en memoria."""
+
+    def __init__(self, df, airports, token="", digest=None, cube=None):
+        self.airports = airports
+        # `token` identifica el contenido (p. ej. hash del archivo subido)
+        self.token = token
+        # Vuelos y cubo ordenados e indexados una sola vez, al cargar el dataset;
+        # `cube` permite reutilizar un cubo ya precalculado (ver jobs.py)
+        self._flights = SortedIndex(df.sort(INDEX_KEYS))
+        self._cube = SortedIndex(build_route_cube(df) if cube is None else cube)
+        # Manifiesto en memoria: {(año, mes): hash del archivo de origen}
+        self.sources = {key: digest for key in self._cube.keys()}
+        self.totals = month_totals(self._cube.frame)
+
+    def append(self, df, token, digest=None):
+        """Dataset con los meses de `df` añadidos (o reemplazados), sin reprocesar los demás.
+
+        Si `digest` ya está en el manifiesto el archivo ya fue incorporado: se
+        devuelve una copia que comparte los datos pero lleva el `token` pedido,
+        para que quien la registre bajo ese token la reconozca después.
+        """
+        if digest is not None and digest in self.sources.values():
+            dataset = copy.copy(self)
+            dataset.token = token
+            return dataset
+
+        added = FrameDataset(df, self.airports, token=token, digest=digest)
+        dataset = FrameDataset.__new__(FrameDataset)
+        dataset.airports = self.airports
+        dataset.token = token
+        dataset._flights = merge_indexes([self._flights, added._flights])
+        dataset._cube = merge_indexes([self._cube, added._cube])
+        dataset.sources = {**self.sources, **added.sources}
+        dataset.totals = {**self.totals, **added.totals}
+        return dataset
+
+    @property
+    def df(self):
+        return self._flights.frame
+
+    def estimated_size(self):
+        return self._flights.frame.estimated_size() + self._cube.frame.estimated_size()
+
+    def years(self):
+        return sorted({year for year, _ in self._cube.keys()})
+
+    def months(self, year=None):
+        return sorted({m for y, m in self._cube.keys() if year is None or y == year})
+
+    def _slices(self, index, year, month, origin=None, dest=None):
+        keys = [
+            (y, m) for y, m in index.keys()
+            if (year is None or y == year) and (month is None or m == month)
+        ]
+        if not keys:
+            return index.frame.clear()
+        return pl.concat([index.slice(y, m, origin, dest) for y, m in keys], how="vertical")
+
+    def load(self, year=None, month=None):
+        return self._slices(self._flights, year, month)
+
+    def cube(self, year=None, month=None, origin=None, dest=None):
+        return self._slices(self._cube, year, month, origin, dest)
+
+    def origins(self, year, month):
+        return self._cube.origins(year, month)
+
+    def destinations(self, year, month):
+        return self._cube.destinations(year, month)
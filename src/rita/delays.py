@@ -0,0 +1,129 @@
+"""Analítica de retrasos y cancelaciones de RITA, fuera de memoria.
+
+Para cada partición mensual se calculan, con la ejecución en streaming de
+Polars y leyendo sólo las columnas necesarias, cuatro agregados:
+
+* `airlines`: por aerolínea.
+* `routes`: por par origen–destino.
+* `daily`: por día.
+* `heatmap`: por día de la semana y hora programada de salida.
+
+Cada agregado incluye vuelos, tasa de cancelación, tasa de puntualidad
+(ArrDelay <= 15 min, con sus conteos `on_time` y `arrivals` para combinar
+grupos) y percentiles p50/p95/p99 de DepDelay y ArrDelay (el heatmap sólo
+guarda el retraso medio de salida). Los agregados se guardan en
+disco como Parquet por partición, así que cada mes se procesa una sola vez.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import polars as pl
+
+from cache import CACHE_DIR
+
+# Subir este número cuando cambien los agregados
+DELAYS_VERSION = 3
+
+DELAY_COLUMNS = [
+    "FlightDate", "Reporting_Airline", "Origin", "Dest",
+    "CRSDepTime", "DepDelay", "ArrDelay", "Cancelled",
+]
+
+ON_TIME_MINUTES = 15
+PERCENTILES = (0.5, 0.95, 0.99)
+
+AGGREGATES = ("airlines", "routes", "daily", "heatmap")
+
+
+def _delay_aggs():
+    aggs = [
+        pl.len().alias("flights"),
+        pl.col("Cancelled").mean().alias("cancel_rate"),
+        # La media de un booleano ignora nulos (vuelos cancelados o desviados)
+        (pl.col("ArrDelay") <= ON_TIME_MINUTES).mean().alias("on_time_rate"),
+        # Numerador y denominador de la tasa: al combinar grupos se suman
+        (pl.col("ArrDelay") <= ON_TIME_MINUTES).sum().alias("on_time"),
+        pl.col("ArrDelay").count().alias("arrivals"),
+    ]
+    for column in ("DepDelay", "ArrDelay"):
+        for q in PERCENTILES:
+            aggs.append(pl.col(column).quantile(q, interpolation="linear").alias(f"{column}_p{round(q * 100)}"))
+    return aggs
+
+
+def delay_queries(flights):
+    """Los cuatro agregados de retrasos como LazyFrames sobre el mismo plan."""
+    lf = flights.with_columns([
+        # CRSDepTime viene como hhmm (p. ej. 1730); 2400 equivale a medianoche
+        ((pl.col("CRSDepTime") // 100) % 24).alias("Hour"),
+        pl.col("FlightDate").dt.weekday().alias("Weekday"),
+    ])
+    return {
+        # Códigos como texto: los agregados se persisten y se muestran tal cual
+        "airlines": lf.group_by("AIRLINE").agg(_delay_aggs())
+        .with_columns(pl.col("AIRLINE").cast(pl.Utf8))
+        .sort("flights", descending=True),
+        "routes": lf.group_by(["IATA_ORIGIN", "IATA_DEST"]).agg(_delay_aggs())
+        .with_columns(pl.col(["IATA_ORIGIN", "IATA_DEST"]).cast(pl.Utf8))
+        .sort("flights", descending=True),
+        "daily": lf.group_by("FlightDate").agg(_delay_aggs()).sort("FlightDate"),
+        "heatmap": lf.group_by(["Weekday", "Hour"]).agg([
+            pl.len().alias("flights"),
+            pl.col("DepDelay").mean().alias("DepDelay_mean"),
+            pl.col("Cancelled").mean().alias("cancel_rate"),
+        ]).sort(["Weekday", "Hour"]),
+    }
+
+
+def compute_delay_aggregates(flights):
+    """Ejecuta los cuatro agregados en una sola pasada en streaming."""
+    queries = delay_queries(flights)
+    frames = pl.collect_all(list(queries.values()), engine="streaming")
+    return dict(zip(queries, frames))
+
+
+class DelayStore:
+    """Agregados de retrasos por partición mensual, persistidos como Parquet."""
+
+    def __init__(self, root=CACHE_DIR / "delays"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, key):
+        return self.root / f"{key}-v{DELAYS_VERSION}"
+
+    def get(self, key):
+        path = self._dir(key)
+        if not path.exists():
+            return None
+        return {name: pl.read_parquet(path / f"{name}.parquet") for name in AGGREGATES}
+
+    def put(self, key, aggregates):
+        # Se escribe en un directorio temporal y se renombra de forma atómica
+        tmp = Path(tempfile.mkdtemp(dir=self.root, suffix=".tmp"))
+        for name in AGGREGATES:
+            aggregates[name].write_parquet(tmp / f"{name}.parquet", compression="zstd")
+        target = self._dir(key)
+        if target.exists():
+            shutil.rmtree(tmp)
+        else:
+            os.replace(tmp, target)
+
+    def get_or_build(self, key, build):
+        """Agregados de `key` desde disco, o `build()` -> LazyFrame de vuelos."""
+        aggregates = self.get(key)
+        if aggregates is None:
+            aggregates = compute_delay_aggregates(build())
+            self.put(key, aggregates)
+        return aggregates
+
+
+def partition_delays(dataset, store, year, month):
+    """Agregados de retrasos de un mes de un `RitaDataset` (cacheados por partición)."""
+    key = (year, month)
+    if key not in dataset.partitions:
+        return None
+    store_key = f"{dataset.partition_digest(key)}-{dataset.airports.version}"
+    return store.get_or_build(store_key, lambda: dataset.scan(year, month, columns=DELAY_COLUMNS))
@@ -0,0 +1,192 @@
+"""Descarga paralela y conversión a Parquet de los archivos mensuales de RITA.
+
+Versión en Python de `data/rita.sh` + `data/extract_csv.sh`:
+
+* `download`: baja los ZIP mensuales con un pool acotado de hilos, reanuda
+  descargas parciales (`.part` + cabecera Range) y omite los meses ya en disco.
+  Sólo un `.part` completo y válido se renombra al nombre final del ZIP.
+* `convert`: lee el CSV directamente desde cada ZIP, por lotes, y lo escribe
+  en un dataset Parquet particionado estilo Hive (year=/month=) con el esquema
+  fijo de `ingest.RITA_SCHEMA`. El CSV descomprimido nunca toca el disco.
+* `sync`: ambos pasos. `convert` funciona sin red sobre un directorio local de ZIP.
+
+Ejemplos:
+
+    python src/rita/download.py download --start 2024-1 --end 2025-12 --zips data
+    python src/rita/download.py convert --zips data --out data/parquet
+"""
+import argparse
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import requests
+
+from ingest import RITA_SCHEMA
+
+ZIP_PREFIX = "On_Time_Reporting_Carrier_On_Time_Performance_1987_present_"
+BASE_URL = "https://transtats.bts.gov/PREZIP/"
+ZIP_RE = re.compile(r"_(?P<year>\d{4})_(?P<month>\d{1,2})\.zip$", re.IGNORECASE)
+
+DEFAULT_WORKERS = 4
+CHUNK_SIZE = 1 << 20
+BLOCK_SIZE = 16 << 20  # Tamaño de bloque del lector CSV de Arrow
+
+# Esquema Arrow equivalente al esquema Polars del proyecto
+ARROW_TYPES = {pl.Utf8: pa.string(), pl.Int32: pa.int32(), pl.Float64: pa.float64()}
+ARROW_SCHEMA = pa.schema([(name, ARROW_TYPES[dtype]) for name, dtype in RITA_SCHEMA.items()])
+
+
+def month_range(start, end):
+    """Lista de (año, mes) entre dos cadenas 'AAAA-M', ambas inclusive."""
+    y0, m0 = (int(x) for x in start.split("-"))
+    y1, m1 = (int(x) for x in end.split("-"))
+    months = []
+    year, month = y0, m0
+    while (year, month) <= (y1, m1):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def zip_name(year, month):
+    return f"{ZIP_PREFIX}{year}_{month}.zip"
+
+
+def download_month(year, month, zip_dir, timeout=60):
+    """Descarga un mes, reanudando desde el `.part` si existe."""
+    target = Path(zip_dir) / zip_name(year, month)
+    if target.exists():
+        return target, "skip"
+
+    part = target.with_name(target.name + ".part")
+    offset = part.stat().st_size if part.exists() else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with requests.get(BASE_URL + target.name, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 416:
+            # El servidor indica que el .part ya está completo
+            _publish(part, target)
+            return target, "resume"
+        response.raise_for_status()
+
+        # 206: el servidor aceptó el Range; 200: hay que empezar de cero
+        mode = "ab" if response.status_code == 206 else "wb"
+        with open(part, mode) as fh:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                fh.write(chunk)
+
+    _publish(part, target)
+    return target, "resume" if offset and mode == "ab" else "download"
+
+
+def _publish(part, target):
+    """Renombra el `.part` al ZIP final sólo si es un ZIP legible."""
+    if not zipfile.is_zipfile(part):
+        # Un .part corrupto no se puede reanudar: la próxima ejecución empieza de cero
+        part.unlink()
+        raise OSError(f"{part.name}: la descarga no es un ZIP válido")
+    os.replace(part, target)
+
+
+def download(months, zip_dir, workers=DEFAULT_WORKERS):
+    """Descarga en paralelo los meses indicados con un pool acotado."""
+    zip_dir = Path(zip_dir)
+    zip_dir.mkdir(parents=True, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(download_month, y, m, zip_dir): (y, m) for y, m in months}
+        for future in as_completed(futures):
+            year, month = futures[future]
+            try:
+                path, status = future.result()
+                print(f"[{status}] {year}-{month:02d} {path.name}")
+            except (requests.RequestException, OSError) as exc:
+                # Disco lleno, permisos...: queda a lo sumo el .part, nunca un ZIP parcial
+                print(f"[error] {year}-{month:02d} {exc}")
+
+
+def partition_path(out_dir, year, month):
+    return Path(out_dir) / f"year={year}" / f"month={month}" / "data.parquet"
+
+
+def convert_zip(zip_path, out_dir):
+    """Convierte un ZIP mensual a su partición Parquet leyendo el CSV por lotes."""
+    match = ZIP_RE.search(Path(zip_path).name)
+    year, month = int(match["year"]), int(match["month"])
+    target = partition_path(out_dir, year, month)
+    if target.exists():
+        return target, "skip"
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=ARROW_SCHEMA.names,
+        column_types=ARROW_SCHEMA,
+    )
+    with zipfile.ZipFile(zip_path) as zf:
+        member = next(n for n in zf.namelist() if n.lower().endswith(".csv"))
+        with zf.open(member) as fh:
+            reader = pa_csv.open_csv(
+                fh,
+                read_options=pa_csv.ReadOptions(block_size=BLOCK_SIZE),
+                convert_options=convert_options,
+            )
+            try:
+                with pq.ParquetWriter(tmp, ARROW_SCHEMA, compression="zstd") as writer:
+                    for batch in reader:
+                        writer.write_batch(batch)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+
+    os.replace(tmp, target)
+    return target, "convert"
+
+
+def convert(zip_dir, out_dir, workers=DEFAULT_WORKERS):
+    """Convierte todos los ZIP de `zip_dir` (sin red) al dataset Parquet."""
+    zips = sorted(p for p in Path(zip_dir).glob("*.zip") if ZIP_RE.search(p.name))
+
+    # Arrow libera el GIL al parsear y comprimir: los hilos sí escalan
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(convert_zip, path, out_dir): path for path in zips}
+        for future in as_completed(futures):
+            try:
+                path, status = future.result()
+                print(f"[{status}] {path}")
+            except (OSError, pa.ArrowException, zipfile.BadZipFile) as exc:
+                print(f"[error] {futures[future].name} {exc}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Descarga y conversión a Parquet de RITA.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("download", "convert", "sync"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--zips", default="data", help="Directorio de los ZIP mensuales.")
+        cmd.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+        if name in ("download", "sync"):
+            cmd.add_argument("--start", default="2024-1", help="Primer mes (AAAA-M).")
+            cmd.add_argument("--end", default="2025-12", help="Último mes (AAAA-M).")
+        if name in ("convert", "sync"):
+            cmd.add_argument("--out", default="data/parquet", help="Raíz del dataset Parquet.")
+
+    args = parser.parse_args(argv)
+
+    if args.command in ("download", "sync"):
+        download(month_range(args.start, args.end), args.zips, args.workers)
+    if args.command in ("convert", "sync"):
+        convert(args.zips, args.out, args.workers)
+
+
+if __name__ == "__main__":
+    main()
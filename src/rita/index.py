@@ -0,0 +1,135 @@
+"""Índice ordenado por (Year, Month, origen, destino) con tablas de offsets.
+
+Sobre un frame ordenado por esas cuatro claves (como el cubo de rutas), una
+selección Año/Mes, Año/Mes/Origen o Año/Mes/Origen/Destino es un rango
+contiguo de filas: se resuelve con `DataFrame.slice`, que no copia datos. Las
+listas de opciones de los selectores se precalculan al construir el índice.
+
+`merge_indexes` combina índices de meses distintos desplazando sus offsets,
+sin volver a ordenar ni a recorrer los datos ya indexados.
+"""
+import polars as pl
+
+INDEX_KEYS = ["Year", "Month", "IATA_ORIGIN", "IATA_DEST"]
+
+
+def _offsets(bounds, keys):
+    """{clave: (inicio, largo)} agregando los rangos contiguos de `bounds`."""
+    table = (
+        bounds.group_by(keys, maintain_order=True)
+        .agg(pl.col("start").min(), pl.col("length").sum())
+    )
+    return {
+        tuple(row[:-2]): (row[-2], row[-1])
+        for row in table.rows()
+    }
+
+
+class SortedIndex:
+    """Tablas de offsets sobre un frame ordenado por `INDEX_KEYS`."""
+
+    def __init__(self, frame):
+        self.frame = frame
+
+        bounds = (
+            frame.select(INDEX_KEYS)
+            .with_row_index("row")
+            .group_by(INDEX_KEYS, maintain_order=True)
+            .agg(pl.col("row").first().alias("start"), pl.len().alias("length"))
+            .with_columns(pl.col(["IATA_ORIGIN", "IATA_DEST"]).cast(pl.Utf8))
+        )
+
+        self.month_offsets = _offsets(bounds, ["Year", "Month"])
+        self.origin_offsets = _offsets(bounds, ["Year", "Month", "IATA_ORIGIN"])
+        self.route_offsets = {
+            (y, m, o, d): (start, length)
+            for y, m, o, d, start, length in bounds.rows()
+        }
+
+        # Opciones de los selectores por mes, sin recorrer los datos después
+        self.options = {}
+        for y, m, o, d in self.route_offsets:
+            origins, dests = self.options.setdefault((y, m), (set(), set()))
+            origins.add(o)
+            dests.add(d)
+        self.options = {
+            key: (sorted(origins), sorted(dests))
+            for key, (origins, dests) in self.options.items()
+        }
+
+    @classmethod
+    def _from_tables(cls, frame, month_offsets, origin_offsets, route_offsets, options):
+        index = cls.__new__(cls)
+        index.frame = frame
+        index.month_offsets = month_offsets
+        index.origin_offsets = origin_offsets
+        index.route_offsets = route_offsets
+        index.options = options
+        return index
+
+    def keys(self):
+        return sorted(self.month_offsets)
+
+    def origins(self, year, month):
+        return self.options.get((year, month), ([], []))[0]
+
+    def destinations(self, year, month):
+        return self.options.get((year, month), ([], []))[1]
+
+    def slice(self, year, month, origin=None, dest=None):
+        """Filas de la selección; vacío si no existe. Sin copia salvo destino sin origen."""
+        if origin is not None and dest is not None:
+            bounds = self.route_offsets.get((year, month, origin, dest))
+        elif origin is not None:
+            bounds = self.origin_offsets.get((year, month, origin))
+        else:
+            bounds = self.month_offsets.get((year, month))
+
+        if bounds is None:
+            return self.frame.clear()
+
+        selected = self.frame.slice(*bounds)
+        if origin is None and dest is not None:
+            # Un destino sin origen no es contiguo: filtro sobre el mes ya recortado
+            selected = selected.filter(pl.col("IATA_DEST") == dest)
+        return selected
+
+
+def merge_indexes(indexes):
+    """Un solo `SortedIndex` con los meses de `indexes`; si un mes se repite gana el último.
+
+    Cada mes es un bloque contiguo, así que el frame combinado es la
+    concatenación de esos bloques en orden (Year, Month) y las tablas de offsets
+    sólo se desplazan.
+    """
+    owner = {}
+    for index in indexes:
+        for key in index.keys():
+            owner[key] = index
+
+    blocks = []
+    month_offsets, origin_offsets, route_offsets, options = {}, {}, {}, {}
+    shifts = {}
+    position = 0
+    for key in sorted(owner):
+        index = owner[key]
+        start, length = index.month_offsets[key]
+        blocks.append(index.frame.slice(start, length))
+        month_offsets[key] = (position, length)
+        options[key] = index.options[key]
+        shifts[key] = position - start
+        position += length
+
+    # Una pasada por índice sobre sus tablas, conservando sólo los meses que aporta
+    for index in {id(index): index for index in owner.values()}.values():
+        for table, merged in ((index.origin_offsets, origin_offsets), (index.route_offsets, route_offsets)):
+            for k, (start, length) in table.items():
+                if owner.get(k[:2]) is index:
+                    merged[k] = (start + shifts[k[:2]], length)
+
+    if not blocks:
+        frame = indexes[0].frame.clear() if indexes else pl.DataFrame()
+    else:
+        # Sin rechunk: el frame combinado reutiliza la memoria de cada bloque
+        frame = pl.concat(blocks, how="vertical", rechunk=False)
+    return SortedIndex._from_tables(frame, month_offsets, origin_offsets, route_offsets, options)
@@ -0,0 +1,102 @@
+"""Ingesta perezosa (lazy) de archivos RITA con Polars."""
+import zipfile
+from pathlib import Path
+
+import polars as pl
+
+from codes import encode_airline
+
+# Esquema fijo de las columnas RITA que conserva el proyecto.
+# Las demás (~110 columnas) nunca se materializan en memoria.
+RITA_SCHEMA = {
+    "FlightDate": pl.Utf8,
+    "Reporting_Airline": pl.Utf8,
+    "Origin": pl.Utf8,
+    "Dest": pl.Utf8,
+    "CRSDepTime": pl.Int32,
+    "DepDelay": pl.Float64,
+    "ArrDelay": pl.Float64,
+    "Cancelled": pl.Float64,
+    "Diverted": pl.Float64,
+}
+
+# Columnas que necesita el análisis de rutas
+ROUTE_COLUMNS = ["FlightDate", "Reporting_Airline", "Origin", "Dest"]
+
+RENAME_MAP = {
+    "Origin": "IATA_ORIGIN",
+    "Dest": "IATA_DEST",
+    "Reporting_Airline": "AIRLINE",
+}
+
+
+def scan_rita(source, columns=None):
+    """Devuelve un LazyFrame de un archivo RITA sólo con las columnas pedidas.
+
+    `source` puede ser un buffer (p. ej. UploadedFile de Streamlit) o una ruta a
+    un CSV, un ZIP con el CSV mensual, un Parquet o un directorio Parquet
+    particionado estilo Hive (year=/month=).
+    """
+    columns = list(columns or ROUTE_COLUMNS)
+    schema = {col: RITA_SCHEMA[col] for col in columns}
+
+    if not isinstance(source, (str, Path)):
+        # Buffers: el parser sólo materializa `columns`
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return pl.read_csv(
+            source,
+            columns=columns,
+            infer_schema_length=0,
+            schema_overrides=schema,
+        ).lazy()
+
+    path = Path(source)
+
+    if path.is_dir():
+        return pl.scan_parquet(path / "**" / "*.parquet", hive_partitioning=True).select(columns)
+
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        return pl.scan_parquet(path).select(columns)
+
+    if suffix == ".zip":
+        # Se lee el CSV directamente del ZIP, sin extraerlo a disco
+        with zipfile.ZipFile(path) as zf:
+            member = next(n for n in zf.namelist() if n.lower().endswith(".csv"))
+            with zf.open(member) as fh:
+                return scan_rita(fh, columns)
+
+    # CSV sobre disco: scan_csv aplica projection y predicate pushdown
+    return pl.scan_csv(
+        path,
+        infer_schema_length=0,
+        schema_overrides=schema,
+    ).select(columns)
+
+
+def enrich_flights(lf, airports):
+    """Normaliza fechas y codifica aeropuertos/aerolíneas con los Enum globales (lazy).
+
+    `airports` es un `codes.AirportIndex`: los vuelos cuyo origen o destino no
+    tiene coordenadas en el índice se descartan, igual que con la unión previa.
+    """
+    return (
+        lf.rename(RENAME_MAP)
+        .with_columns(pl.col("FlightDate").str.strptime(pl.Date, strict=False))
+        # Filtro temprano: se empuja hasta el scan
+        .filter(pl.col("FlightDate").is_not_null())
+        .with_columns([
+            pl.col("FlightDate").dt.year().alias("Year"),
+            pl.col("FlightDate").dt.month().alias("Month"),
+            airports.encode(pl.col("IATA_ORIGIN")).alias("IATA_ORIGIN"),
+            airports.encode(pl.col("IATA_DEST")).alias("IATA_DEST"),
+            encode_airline(pl.col("AIRLINE")).alias("AIRLINE"),
+        ])
+        .drop_nulls(["IATA_ORIGIN", "IATA_DEST"])
+    )
+
+
+def load_rita(source, airports):
+    """Carga y enriquece un archivo RITA con ejecución en streaming."""
+    return enrich_flights(scan_rita(source), airports).collect(engine="streaming")
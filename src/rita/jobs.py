@@ -0,0 +1,286 @@
+"""Trabajos en segundo plano para precalcular los artefactos pesados de RITA.
+
+Un `JobRunner` reparte los trabajos en un pool de procesos (la cola es la del
+executor), así que varios datasets se procesan en paralelo en varios núcleos
+sin bloquear el servidor de Streamlit. Cada trabajo escribe su avance en
+`status.json` dentro de su directorio y la interfaz sólo lo consulta.
+
+* `precompute_upload`: vuelos enriquecidos (en la `FlightCache`), cubo de rutas
+  y el mapa por defecto de cada mes, en ese orden; cada artefacto se anuncia
+  en `ready` en cuanto está en disco.
+* `precompute_partition`: una partición de un directorio de datos: vuelos
+  enriquecidos y agregados de retrasos.
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import polars as pl
+
+from cache import CACHE_DIR, FlightCache
+
+JOBS_DIR = CACHE_DIR / "jobs"
+# Cambia cuando cambia el formato de los artefactos (p. ej. el Enum de aerolíneas)
+JOBS_VERSION = 2
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+
+def job_dir(token):
+    return JOBS_DIR / f"{token}-v{JOBS_VERSION}"
+
+
+def _write_json(path, payload):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(payload, fh)
+    os.replace(tmp, path)
+
+
+def read_status(token):
+    """Estado de un trabajo: state, stage, progress (0–1), ready, error; o None."""
+    path = job_dir(token) / "status.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+class _Progress:
+    """Estado de un trabajo escrito de forma atómica en su directorio."""
+
+    def __init__(self, token):
+        self.path = job_dir(token) / "status.json"
+        self.status = {"state": "running", "stage": "", "progress": 0.0, "ready": [], "error": None}
+
+    def update(self, stage, progress, ready=None, state="running"):
+        self.status.update(stage=stage, progress=round(progress, 3), state=state)
+        if ready is not None:
+            self.status["ready"].append(ready)
+        self.status["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        _write_json(self.path, self.status)
+
+
+def _airport_index():
+    # Import diferido: en el proceso hijo sólo se carga lo que el trabajo usa
+    from airports import airport_store_version, load_airport_store
+    from codes import AirportIndex
+
+    return AirportIndex(load_airport_store(), airport_store_version())
+
+
+def month_map(cube, airports):
+    """Mapa por defecto de un mes (todas las rutas, GeoJSON): (html, vuelos omitidos).
+
+    Es el mismo que arma la página de rutas sin filtros de Origen/Destino.
+    """
+    from map_render import build_route_map, level_of_detail, render_html, routes_for_map
+    from metrics import route_metrics
+
+    route_counts, airports_unique = routes_for_map(route_metrics(cube).routes, airports)
+    routes_lod, omitted = level_of_detail(route_counts)
+    return render_html(build_route_map(routes_lod, airports_unique)), omitted
+
+
+def _map_paths(token, year, month):
+    base = job_dir(token) / "maps" / f"{year:04d}-{month:02d}"
+    return base.with_suffix(".html"), base.with_suffix(".json")
+
+
+def _touch(token):
+    # El mtime del directorio hace de marca de último acceso para el desalojo LRU
+    try:
+        os.utime(job_dir(token))
+    except FileNotFoundError:
+        pass
+
+
+def precomputed_map(token, year, month):
+    """(html, vuelos omitidos) del mapa precalculado de un mes, o None."""
+    html_path, meta_path = _map_paths(token, year, month)
+    try:
+        omitted = json.loads(meta_path.read_text())["omitted"]
+        html = html_path.read_text()
+    except FileNotFoundError:
+        # Todavía no calculado, o desalojado de la caché
+        return None
+    _touch(token)
+    return html, omitted
+
+
+def precomputed_cube(token):
+    """Cubo de rutas precalculado, o None."""
+    path = job_dir(token) / "cube.arrow"
+    if not path.exists():
+        return None
+    _touch(token)
+    return pl.read_ipc(path)
+
+
+def job_entries(root=JOBS_DIR):
+    """(directorio, bytes, último acceso) de cada trabajo terminado bajo `root`.
+
+    `FlightCache.evict` los desaloja junto con sus propias entradas; los
+    trabajos en cola o en curso no se tocan.
+    """
+    entries = []
+    for path in Path(root).glob("*-v*"):
+        status_path = path / "status.json"
+        try:
+            if status_path.exists() and json.loads(status_path.read_text())["state"] in ("queued", "running"):
+                continue
+            size = sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+            entries.append((path, size, path.stat().st_mtime))
+        except (OSError, ValueError):
+            # Otro proceso lo está escribiendo o desalojando
+            continue
+    return entries
+
+
+def precompute_upload(source, digest, token):
+    """Trabajo de un archivo RITA: vuelos enriquecidos, cubo y mapa de cada mes."""
+    from cube import build_route_cube
+    from index import SortedIndex
+
+    progress = _Progress(token)
+    try:
+        progress.update("Enriqueciendo vuelos", 0.05)
+        airports = _airport_index()
+        flights = FlightCache(tag=airports.version).get_or_build(source, airports, digest=digest)
+        progress.update("Construyendo el cubo de rutas", 0.4, ready="flights")
+
+        cube = build_route_cube(flights)
+        del flights
+        fd, tmp = tempfile.mkstemp(dir=job_dir(token), suffix=".tmp")
+        os.close(fd)
+        cube.write_ipc(tmp, compression="uncompressed")
+        os.replace(tmp, job_dir(token) / "cube.arrow")
+        progress.update("Precalculando mapas", 0.5, ready="cube")
+
+        index = SortedIndex(cube)
+        months = index.keys()
+        for i, (year, month) in enumerate(months, start=1):
+            html, omitted = month_map(index.slice(year, month), airports)
+            html_path, meta_path = _map_paths(token, year, month)
+            html_path.parent.mkdir(parents=True, exist_ok=True)
+            html_path.write_text(html)
+            # El .json se escribe al final: marca el mapa como completo
+            _write_json(meta_path, {"omitted": omitted})
+            progress.update("Precalculando mapas", 0.5 + 0.5 * i / len(months), ready=f"map:{year:04d}-{month:02d}")
+
+        progress.update("Listo", 1.0, state="done")
+    except Exception:
+        progress.status["error"] = traceback.format_exc(limit=3)
+        progress.update("Error", progress.status["progress"], state="failed")
+        raise
+    finally:
+        # La copia se borra también si falla: un reintento la vuelve a escribir
+        Path(source).unlink(missing_ok=True)
+
+
+def precompute_partition(path, token):
+    """Trabajo de una partición mensual: vuelos enriquecidos y agregados de retrasos."""
+    from cache import file_digest
+    from delays import DELAY_COLUMNS, DelayStore
+    from ingest import enrich_flights, scan_rita
+
+    progress = _Progress(token)
+    try:
+        progress.update("Calculando el hash", 0.05)
+        airports = _airport_index()
+        digest = file_digest(path)
+        progress.update("Enriqueciendo vuelos", 0.2)
+        FlightCache(tag=airports.version).get_or_build(path, airports, digest=digest)
+        progress.update("Agregando retrasos", 0.6, ready="flights")
+        # Misma clave que `delays.partition_delays`
+        DelayStore().get_or_build(
+            f"{digest}-{airports.version}",
+            lambda: enrich_flights(scan_rita(path, columns=DELAY_COLUMNS), airports),
+        )
+        progress.update("Listo", 1.0, ready="delays", state="done")
+    except Exception:
+        progress.status["error"] = traceback.format_exc(limit=3)
+        progress.update("Error", progress.status["progress"], state="failed")
+        raise
+
+
+class JobRunner:
+    """Pool de procesos con un trabajo por token; el estado vive en disco."""
+
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        # spawn: el servidor de Streamlit tiene hilos y fork no es seguro
+        self._executor = ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, token, fn, *args, retry=False):
+        """Encola `fn(*args)` salvo que el trabajo ya esté en curso o terminado.
+
+        Un trabajo fallido devuelve su estado tal cual; sólo se vuelve a
+        encolar con `retry=True` (una acción explícita del usuario).
+        """
+        with self._lock:
+            future = self._futures.get(token)
+            if future is not None and not future.done():
+                return self.status(token)
+            status = self.status(token)
+            if status is not None and (status["state"] == "done" or (status["state"] == "failed" and not retry)):
+                return status
+            _write_json(
+                job_dir(token) / "status.json",
+                {"state": "queued", "stage": "En cola", "progress": 0.0, "ready": [], "error": None},
+            )
+            self._futures[token] = self._executor.submit(fn, *args)
+        return self.status(token)
+
+    def submit_upload(self, uploaded_file, digest, token, retry=False):
+        """Copia el archivo subido a disco (el hijo no comparte el buffer) y lo encola.
+
+        La copia es por token y el trabajo la borra al terminar.
+        """
+        if (status := self.status(token)) is not None and (
+            status["state"] == "done" or (status["state"] == "failed" and not retry)
+        ):
+            return status
+        spool = JOBS_DIR / "uploads" / f"{token}.csv"
+        if not spool.exists():
+            spool.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=spool.parent, suffix=".tmp")
+            uploaded_file.seek(0)
+            with os.fdopen(fd, "wb") as fh:
+                shutil.copyfileobj(uploaded_file, fh)
+            uploaded_file.seek(0)
+            os.replace(tmp, spool)
+        return self.submit(token, precompute_upload, spool, digest, token, retry=retry)
+
+    def submit_partitions(self, partitions, airports_version):
+        """Encola cada partición de un directorio; devuelve {(año, mes): token}.
+
+        Se llama desde un botón, así que los meses fallidos se reintentan.
+        """
+        from dataset import partitions_token
+
+        tokens = {}
+        for key, path in sorted(partitions.items()):
+            token = f"part-{partitions_token({key: path})}-{airports_version}"
+            self.submit(token, precompute_partition, path, token, retry=True)
+            tokens[key] = token
+        return tokens
+
+    def status(self, token):
+        status = read_status(token)
+        future = self._futures.get(token)
+        # Un hijo que murió sin escribir su error (p. ej. por memoria)
+        if future is not None and future.done() and future.exception() is not None:
+            if status is None or status["state"] != "failed":
+                status = {**(status or {}), "state": "failed", "error": repr(future.exception())}
+        return status
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
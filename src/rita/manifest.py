@@ -0,0 +1,167 @@
+"""Manifiesto de las particiones RITA ya procesadas.
+
+Por cada partición mensual se registra el hash de su contenido, la versión del
+catálogo de aeropuertos, los totales del mes y su cubo de rutas ya agregado
+(Arrow IPC). Al llegar un mes nuevo sólo se enriquece y agrega esa partición;
+las ya registradas se leen del manifiesto, así que el costo de actualizar es
+proporcional a los datos nuevos.
+
+Uso como CLI para procesar los meses pendientes de un directorio:
+
+    python src/rita/manifest.py update data/
+    python src/rita/manifest.py info
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import polars as pl
+
+from cache import CACHE_DIR
+
+# Subir este número cuando cambie el formato de las entradas o de los cubos
+MANIFEST_VERSION = 2
+
+MANIFEST_DIR = CACHE_DIR / "manifest"
+
+
+def partition_name(key):
+    year, month = key
+    return f"{year:04d}-{month:02d}"
+
+
+class PartitionManifest:
+    """Registro persistente {partición: hash, aeropuertos, totales, cubo}."""
+
+    def __init__(self, root=MANIFEST_DIR):
+        self.root = Path(root)
+        self.path = self.root / "manifest.json"
+        (self.root / "cubes").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = self._read()
+
+    def _read(self):
+        if not self.path.exists():
+            return {}
+        data = json.loads(self.path.read_text())
+        # Un manifiesto de otra versión se descarta: sus cubos se reconstruyen
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data["partitions"]
+
+    def _write(self):
+        payload = json.dumps(
+            {"version": MANIFEST_VERSION, "partitions": self._entries},
+            indent=2, sort_keys=True,
+        )
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as fh:
+            fh.write(payload)
+        os.replace(tmp, self.path)
+
+    def _cube_path(self, digest, airports_version):
+        return self.root / "cubes" / f"{digest}-{airports_version}-v{MANIFEST_VERSION}.arrow"
+
+    def entry(self, key):
+        with self._lock:
+            return self._entries.get(partition_name(key))
+
+    def is_current(self, key, digest, airports_version):
+        """True si la partición ya está procesada con ese contenido y esos aeropuertos."""
+        entry = self.entry(key)
+        return (
+            entry is not None
+            and entry["digest"] == digest
+            and entry["airports"] == airports_version
+            and self._cube_path(digest, airports_version).exists()
+        )
+
+    def load_cube(self, key, digest, airports_version):
+        """Cubo de rutas registrado de la partición, o None."""
+        if not self.is_current(key, digest, airports_version):
+            return None
+        return pl.read_ipc(self._cube_path(digest, airports_version))
+
+    def record(self, key, source, digest, airports_version, cube):
+        """Guarda el cubo de la partición y la marca como procesada."""
+        path = self._cube_path(digest, airports_version)
+        if not path.exists():
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            os.close(fd)
+            cube.write_ipc(tmp, compression="uncompressed")
+            os.replace(tmp, path)
+
+        totals = cube.select([
+            pl.col("flights").sum().alias("flights"),
+            pl.col("FlightDate").n_unique().alias("days"),
+        ])
+        flights, days = totals.row(0)
+        entry = {
+            "source": str(source),
+            "digest": digest,
+            "airports": airports_version,
+            "flights": int(flights or 0),
+            "days": int(days),
+            "processed_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            # Se relee el archivo: otro proceso (p. ej. la CLI o un trabajo) pudo
+            # registrar particiones desde que se abrió este manifiesto
+            self._entries = {**self._read(), partition_name(key): entry}
+            self._write()
+
+    def pending(self, dataset):
+        """Particiones de un `RitaDataset` que aún no están procesadas."""
+        return [
+            key for key in sorted(dataset.partitions)
+            if not self.is_current(key, dataset.partition_digest(key), dataset.airports.version)
+        ]
+
+    def table(self):
+        """Las entradas del manifiesto como DataFrame (una fila por partición)."""
+        with self._lock:
+            rows = [{"partition": name, **entry} for name, entry in sorted(self._entries.items())]
+        return pl.DataFrame(rows)
+
+
+def update(data_dir, manifest):
+    """Procesa sólo las particiones nuevas o modificadas de `data_dir`."""
+    # Import diferido: dataset -> manifest
+    from airports import airport_store_version, load_airport_store
+    from cache import FlightCache
+    from codes import AirportIndex
+    from dataset import RitaDataset
+
+    airports = AirportIndex(load_airport_store(), airport_store_version())
+    dataset = RitaDataset.from_directory(
+        data_dir, airports, cache=FlightCache(tag=airports.version), manifest=manifest,
+    )
+    pending = manifest.pending(dataset)
+    for key in pending:
+        dataset.cube(*key)
+        print(f"{partition_name(key)}: {manifest.entry(key)['flights']:,} vuelos")
+    print(f"{len(pending)} particiones procesadas, {len(dataset.partitions) - len(pending)} ya al día")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manifiesto de particiones RITA procesadas.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    update_cmd = sub.add_parser("update", help="Procesar los meses nuevos de un directorio")
+    update_cmd.add_argument("data_dir", type=Path)
+    sub.add_parser("info", help="Mostrar las particiones registradas")
+    args = parser.parse_args()
+
+    manifest = PartitionManifest()
+    if args.command == "update":
+        update(args.data_dir, manifest)
+    else:
+        table = manifest.table()
+        print(table if table.height else "Manifiesto vacío")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Construcción del mapa de rutas con Folium.
+
+El modo GeoJSON dibuja todas las rutas en una sola capa `folium.GeoJson` (y
+los aeropuertos en otra) a partir de las columnas de Polars, en lugar de crear
+un objeto Python por ruta. Un nivel de detalle acota el tamaño del mapa: las
+`max_routes` rutas con más vuelos se dibujan por aerolínea, las siguientes se
+agrupan por par origen–destino y el resto sólo se reporta como omitido.
+"""
+import threading
+from collections import OrderedDict
+
+import folium
+import polars as pl
+from folium import PolyLine
+
+from codes import airline_color
+
+MAP_CENTER = [39.5, -98.35]
+MAP_ZOOM = 4
+MAP_TILES = "CartoDB Positron"
+
+DEFAULT_MAX_ROUTES = 500
+DEFAULT_MAX_BUNDLED = 1500
+
+DEFAULT_CACHE_ENTRIES = 64
+DEFAULT_CACHE_BYTES = 256 * 1024 ** 2
+
+BUNDLE_AIRLINE = "Varias"
+BUNDLE_COLOR = "#95a5a6"
+
+ROUTE_COLUMNS = [
+    "IATA_ORIGIN", "IATA_DEST", "AIRLINE", "total", "color",
+    "OriginLat", "OriginLon", "DestLat", "DestLon",
+]
+
+
+def routes_for_map(routes, airports):
+    """Rutas con coordenadas y color por aerolínea, más los aeropuertos únicos.
+
+    `routes` son los totales por (origen, destino, aerolínea) de las métricas y
+    `airports` el `AirportIndex`; las coordenadas salen de un gather por código.
+    """
+    route_counts = (
+        routes
+        .pipe(airports.with_coordinates)
+        # Color por aerolínea desde la paleta fija (vectorizado y estable entre procesos)
+        .with_columns(airline_color(pl.col("AIRLINE")).alias("color"))
+    )
+
+    # Aeropuertos únicos para los marcadores
+    airports_unique = pl.concat([
+        route_counts.select(pl.col("IATA_ORIGIN").alias("IATA")),
+        route_counts.select(pl.col("IATA_DEST").alias("IATA")),
+    ]).unique().with_columns([
+        airports.lat(pl.col("IATA")).alias("lat"),
+        airports.lon(pl.col("IATA")).alias("lon"),
+    ])
+
+    # Códigos como texto para tooltips y gráficas
+    route_counts = route_counts.with_columns(pl.col(["IATA_ORIGIN", "IATA_DEST", "AIRLINE"]).cast(pl.Utf8))
+    airports_unique = airports_unique.with_columns(pl.col("IATA").cast(pl.Utf8))
+    return route_counts, airports_unique
+
+
+def level_of_detail(route_counts, max_routes=DEFAULT_MAX_ROUTES, max_bundled=DEFAULT_MAX_BUNDLED):
+    """Reduce las rutas a un máximo acotado; devuelve (rutas, vuelos omitidos)."""
+    ranked = route_counts.select(ROUTE_COLUMNS).sort("total", descending=True)
+    top = ranked.head(max_routes)
+
+    # Rutas de bajo volumen: se agrupan las aerolíneas de cada par origen–destino
+    bundled = (
+        ranked.slice(max_routes)
+        .group_by(["IATA_ORIGIN", "IATA_DEST", "OriginLat", "OriginLon", "DestLat", "DestLon"])
+        .agg(pl.col("total").sum())
+        .with_columns([
+            pl.lit(BUNDLE_AIRLINE).alias("AIRLINE"),
+            pl.lit(BUNDLE_COLOR).alias("color"),
+        ])
+        .select(ROUTE_COLUMNS)
+        .sort("total", descending=True)
+    )
+    omitted = int(bundled.slice(max_bundled)["total"].sum())
+
+    routes = pl.concat([top, bundled.head(max_bundled)], how="vertical_relaxed")
+
+    # Peso proporcional al total, calculado una sola vez para todas las rutas
+    max_total = routes["total"].max() or 1
+    routes = routes.with_columns(
+        (pl.col("total") / max_total * 4).clip(0.5, 5).alias("weight")
+    )
+    return routes, omitted
+
+
+def routes_geojson(routes):
+    """FeatureCollection de líneas a partir de las columnas del frame de rutas."""
+    columns = routes.select(
+        "IATA_ORIGIN", "IATA_DEST", "AIRLINE", "total", "color", "weight",
+        "OriginLon", "OriginLat", "DestLon", "DestLat",
+    ).to_dict(as_series=False)
+
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": [[olon, olat], [dlon, dlat]]},
+            "properties": {
+                "route": f"{origin} → {dest}",
+                "airline": airline,
+                "total": total,
+                "color": color,
+                "weight": weight,
+            },
+        }
+        for origin, dest, airline, total, color, weight, olon, olat, dlon, dlat in zip(*columns.values())
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def airports_geojson(airports_unique):
+    """FeatureCollection de puntos (IATA, lat, lon)."""
+    columns = airports_unique.select("IATA", "lon", "lat").to_dict(as_series=False)
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {"IATA": iata},
+        }
+        for iata, lon, lat in zip(*columns.values())
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _route_style(feature):
+    props = feature["properties"]
+    return {"color": props["color"], "weight": props["weight"], "opacity": 0.6}
+
+
+def build_route_map(routes, airports_unique):
+    """Mapa con una capa GeoJSON de aeropuertos y otra de rutas."""
+    m = folium.Map(location=MAP_CENTER, zoom_start=MAP_ZOOM, tiles=MAP_TILES)
+
+    folium.GeoJson(
+        airports_geojson(airports_unique),
+        name="Aeropuertos",
+        marker=folium.CircleMarker(
+            radius=3,
+            color="#3498db",
+            fill=True,
+            fill_color="#2980b9",
+            fill_opacity=0.8,
+        ),
+        tooltip=folium.GeoJsonTooltip(fields=["IATA"], labels=False),
+    ).add_to(m)
+
+    folium.GeoJson(
+        routes_geojson(routes),
+        name="Rutas",
+        style_function=_route_style,
+        tooltip=folium.GeoJsonTooltip(fields=["route", "airline", "total"]),
+    ).add_to(m)
+
+    return m
+
+
+def build_route_map_classic(routes, airports_unique):
+    """Mapa con un CircleMarker por aeropuerto y una PolyLine por ruta."""
+    m = folium.Map(location=MAP_CENTER, zoom_start=MAP_ZOOM, tiles=MAP_TILES)
+
+    for iata, lat, lon in airports_unique.select("IATA", "lat", "lon").iter_rows():
+        folium.CircleMarker(
+            location=[lat, lon],
+            radius=3,
+            color="#3498db",
+            fill=True,
+            fill_color="#2980b9",
+            fill_opacity=0.8,
+            tooltip=iata,
+        ).add_to(m)
+
+    for olat, olon, dlat, dlon, color, weight in routes.select(
+        "OriginLat", "OriginLon", "DestLat", "DestLon", "color", "weight"
+    ).iter_rows():
+        PolyLine(
+            locations=[[olat, olon], [dlat, dlon]],
+            color=color,
+            weight=weight,
+            opacity=0.6,
+        ).add_to(m)
+
+    return m
+
+
+def render_html(m):
+    """HTML completo (autocontenido) de un mapa de Folium."""
+    return m.get_root().render()
+
+
+class MapCache:
+    """Caché LRU en memoria del HTML de mapas ya construidos, acotada por entradas y bytes.
+
+    La clave debe identificar la selección completa, p. ej.
+    (dataset, aeropuertos, año, mes, origen, destino, motor, nivel de detalle).
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, html, extra=None):
+        size = len(html)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key)[0])
+            self._entries[key] = (html, extra)
+            self._bytes += size
+            # Se desalojan las menos usadas; la recién insertada siempre se conserva
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (old_html, _) = self._entries.popitem(last=False)
+                self._bytes -= len(old_html)
+
+    def get_or_build(self, key, build):
+        """Devuelve (html, extra) desde la caché o llama a `build()` -> (mapa, extra)."""
+        entry = self.get(key)
+        if entry is None:
+            m, extra = build()
+            entry = (render_html(m), extra)
+            self.put(key, *entry)
+        return entry
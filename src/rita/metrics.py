@@ -0,0 +1,127 @@
+"""Métricas de las páginas RITA calculadas con un solo plan de Polars.
+
+Cada función arma todas las consultas de una página sobre el mismo LazyFrame
+y las ejecuta juntas con `pl.collect_all`, de modo que la lectura y las
+agregaciones comunes se hacen una sola vez. Las páginas sólo dibujan el
+resultado tipado.
+"""
+from dataclasses import dataclass
+
+import polars as pl
+
+CODE_COLUMNS = ["IATA_ORIGIN", "IATA_DEST", "AIRLINE"]
+
+
+@dataclass(frozen=True)
+class DatasetSummary:
+    """KPIs globales de la página principal."""
+
+    total_flights: int
+    num_days: int
+    avg_daily: float
+    preview: pl.DataFrame
+
+
+@dataclass(frozen=True)
+class RouteMetrics:
+    """KPIs, tablas y series de la página de Mapa de Rutas."""
+
+    total_flights: int
+    top_origin: str
+    top_dest: str
+    routes: pl.DataFrame       # IATA_ORIGIN, IATA_DEST, AIRLINE, total
+    top_routes: pl.DataFrame   # Ruta, total (10 filas como máximo)
+    airlines: pl.DataFrame     # AIRLINE, total
+    daily: pl.DataFrame        # FlightDate, vuelos
+
+
+def dataset_summary(flights, preview_rows=5):
+    """Total de vuelos, días de operación y vista previa en una sola pasada."""
+    lf = flights.lazy()
+    totals, preview = pl.collect_all([
+        lf.select([
+            pl.len().alias("flights"),
+            pl.col("FlightDate").n_unique().alias("days"),
+        ]),
+        lf.head(preview_rows),
+    ])
+
+    total_flights, num_days = totals.row(0)
+    return DatasetSummary(
+        total_flights=total_flights,
+        num_days=num_days,
+        avg_daily=total_flights / num_days if num_days > 0 else 0,
+        preview=preview,
+    )
+
+
+def merged_summary(totals, preview):
+    """KPIs globales a partir de los totales por mes, sin recorrer los vuelos.
+
+    `totals` es {(año, mes): (vuelos, días)}; los días de meses distintos no se
+    solapan, así que basta con sumar.
+    """
+    total_flights = sum(flights for flights, _ in totals.values())
+    num_days = sum(days for _, days in totals.values())
+    return DatasetSummary(
+        total_flights=total_flights,
+        num_days=num_days,
+        avg_daily=total_flights / num_days if num_days > 0 else 0,
+        preview=preview,
+    )
+
+
+def _top(lf, column):
+    return (
+        lf.group_by(column)
+        .agg(pl.col("total").sum())
+        .sort(["total", column], descending=[True, False])
+        .head(1)
+        .select(pl.col(column).cast(pl.Utf8))
+    )
+
+
+def route_metrics(cube, top_n=10):
+    """Todas las métricas de la página de rutas a partir del cubo filtrado."""
+    # Subplan común: vuelos por (origen, destino, aerolínea)
+    routes = (
+        cube.lazy()
+        .group_by(CODE_COLUMNS)
+        .agg(pl.col("flights").sum().alias("total"))
+    )
+
+    totals, top_origin, top_dest, routes_df, top_routes, airlines, daily = pl.collect_all([
+        routes.select(pl.col("total").sum()),
+        _top(routes, "IATA_ORIGIN"),
+        _top(routes, "IATA_DEST"),
+        routes,
+        routes.group_by(["IATA_ORIGIN", "IATA_DEST"])
+        .agg(pl.col("total").sum())
+        .sort("total", descending=True)
+        .head(top_n)
+        .select([
+            pl.concat_str(
+                [pl.col("IATA_ORIGIN").cast(pl.Utf8), pl.col("IATA_DEST").cast(pl.Utf8)],
+                separator=" → ",
+            ).alias("Ruta"),
+            pl.col("total"),
+        ]),
+        routes.group_by("AIRLINE")
+        .agg(pl.col("total").sum())
+        .sort("total", descending=True)
+        .with_columns(pl.col("AIRLINE").cast(pl.Utf8)),
+        cube.lazy()
+        .group_by("FlightDate")
+        .agg(pl.col("flights").sum().alias("vuelos"))
+        .sort("FlightDate"),
+    ])
+
+    return RouteMetrics(
+        total_flights=int(totals.item() or 0),
+        top_origin=top_origin.item() if top_origin.height else "—",
+        top_dest=top_dest.item() if top_dest.height else "—",
+        routes=routes_df,
+        top_routes=top_routes,
+        airlines=airlines,
+        daily=daily,
+    )
@@ -0,0 +1,125 @@
+import streamlit as st
+import polars as pl
+import sys
+from pathlib import Path
+
+# src/ en el path: módulos compartidos entre dashboards (instrumentation)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from instrumentation import instrumented_run, span, stop_run
+from charts import daily_chart, grouped_bar_chart, weekday_hour_heatmap
+from dataset import RitaDataset
+from delays import DelayStore, partition_delays
+from registry import shared_registry
+
+@st.cache_resource
+def get_delay_store():
+    """Agregados de retrasos por partición, compartidos por todas las sesiones."""
+    return DelayStore()
+
+with instrumented_run("rita"):
+    # La sesión sólo guarda un handle; el dataset vive en el registro del proceso
+    dataset = None
+    if 'rita_dataset' in st.session_state:
+        dataset = shared_registry().get(st.session_state['rita_dataset'])
+
+    if dataset is None:
+        st.warning("Por favor, carga primero los datos RITA en la página principal.")
+        stop_run()
+
+    st.title("⏱️ Retrasos y Cancelaciones")
+    st.markdown("Puntualidad, percentiles de retraso y cancelaciones por aerolínea, ruta, día y hora.")
+
+    if not isinstance(dataset, RitaDataset):
+        # El CSV subido sólo conserva las columnas de rutas
+        st.info("El análisis de retrasos usa el modo **Directorio de datos** de la página principal.")
+        stop_run()
+
+    # --- Controles de Filtro (Mes/Año) ---
+    años = dataset.years()
+    meses = dataset.months()
+
+    colA, colB = st.columns(2)
+    sel_year = colA.selectbox("Selecciona el AÑO", años, key='delays_year')
+    sel_month = colB.selectbox("Selecciona el MES", meses, key='delays_month')
+
+    with st.spinner("Calculando agregados de retrasos del mes (sólo la primera vez)..."):
+        with span("partition_delays", year=sel_year, month=sel_month):
+            aggregates = partition_delays(dataset, get_delay_store(), sel_year, sel_month)
+
+    if aggregates is None:
+        st.warning(f"⚠️ No hay datos para {sel_year}-{sel_month:02d}.")
+        stop_run()
+
+    airlines = aggregates["airlines"]
+    routes = aggregates["routes"]
+    daily = aggregates["daily"]
+    heatmap = aggregates["heatmap"]
+
+    # ===================================================
+    #   Métricas Globales del Mes
+    # ===================================================
+    st.subheader("📊 Resumen del Mes")
+
+    totals = airlines.select([
+        pl.col("flights").sum(),
+        (pl.col("cancel_rate") * pl.col("flights")).sum() / pl.col("flights").sum(),
+        # La puntualidad sólo cuenta vuelos con ArrDelay (ni cancelados ni desviados)
+        pl.col("on_time").sum() / pl.col("arrivals").sum(),
+    ])
+    total_vuelos, tasa_cancelacion, tasa_puntualidad = totals.row(0)
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("✈️ Vuelos", f"{total_vuelos:,}")
+    c2.metric("✅ Puntualidad (≤ 15 min)", f"{tasa_puntualidad:.1%}")
+    c3.metric("❌ Cancelaciones", f"{tasa_cancelacion:.2%}")
+
+    # --- Por Aerolínea ---
+    st.subheader("🏷️ Retrasos por Aerolínea")
+
+    with span("chart.delay_airlines"):
+        fig_airlines = grouped_bar_chart(
+            airlines,
+            x="AIRLINE",
+            ys=["ArrDelay_p50", "ArrDelay_p95", "ArrDelay_p99"],
+            title="Percentiles de retraso de llegada (min)"
+        )
+        st.plotly_chart(fig_airlines, use_container_width=True)
+        # st.dataframe acepta Polars directamente
+        st.dataframe(airlines, use_container_width=True)
+
+    # --- Por Ruta ---
+    st.subheader("🛣️ Rutas con Mayor Retraso (p95)")
+
+    min_vuelos = st.slider("Vuelos mínimos por ruta", 10, 500, 50, step=10)
+    peores_rutas = (
+        routes.filter(pl.col("flights") >= min_vuelos)
+        .sort("ArrDelay_p95", descending=True)
+        .head(20)
+        .with_columns(
+            pl.concat_str(["IATA_ORIGIN", "IATA_DEST"], separator=" → ").alias("Ruta")
+        )
+    )
+    st.dataframe(peores_rutas, use_container_width=True)
+
+    # --- Serie Diaria ---
+    st.subheader("📅 Puntualidad y Cancelaciones por Día")
+
+    with span("chart.delay_daily"):
+        fig_daily = daily_chart(
+            daily,
+            y=["on_time_rate", "cancel_rate"],
+            title="Tasa de puntualidad y de cancelación diaria"
+        )
+        st.plotly_chart(fig_daily, use_container_width=True)
+
+    # --- Heatmap Día/Hora ---
+    st.subheader("🔥 Retraso Medio de Salida por Día y Hora")
+
+    with span("chart.delay_heatmap"):
+        fig_heat = weekday_hour_heatmap(
+            heatmap,
+            z="DepDelay_mean",
+            title="Retraso medio de salida (min)"
+        )
+        st.plotly_chart(fig_heat, use_container_width=True)
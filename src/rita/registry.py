@@ -0,0 +1,134 @@
+"""Registro de datasets compartido por todas las sesiones del proceso.
+
+Cada dataset (identificado por su token: hash del archivo subido o de las
+particiones del directorio) se guarda una sola vez. Las sesiones sólo guardan
+un `DatasetHandle`; cuando el handle se libera (la sesión cambia de dataset o
+termina) baja el contador de referencias, y los datasets sin referencias se
+desalojan en orden LRU si se supera el presupuesto de memoria.
+
+La construcción de un dataset ocurre fuera del lock del registro: mientras
+una sesión enriquece un mes, las demás siguen usando los datasets ya
+registrados, y las que piden el mismo token esperan a esa construcción en
+lugar de repetirla.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+DEFAULT_MAX_BYTES = int(os.environ.get("RITA_REGISTRY_MAX_BYTES", 4 * 1024 ** 3))
+
+
+def dataset_size(dataset):
+    """Tamaño estimado en bytes de un dataset (tablas en memoria)."""
+    return dataset.estimated_size() if hasattr(dataset, "estimated_size") else 0
+
+
+class DatasetHandle:
+    """Referencia ligera a un dataset del registro, la única que guarda la sesión."""
+
+    __slots__ = ("token", "__weakref__")
+
+    def __init__(self, registry, token):
+        self.token = token
+        weakref.finalize(self, registry.release, token)
+
+
+class DatasetRegistry:
+    """Una copia inmutable por token, con contador de referencias y presupuesto de memoria."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._datasets = OrderedDict()
+        self._refs = {}
+        # Construcciones en curso: token -> Future que se resuelve al publicar el dataset
+        self._building = {}
+        # RLock: el finalizador de un handle puede ejecutarse dentro de acquire()
+        self._lock = threading.RLock()
+
+    def acquire(self, token, build):
+        """Devuelve un handle al dataset `token`, construyéndolo con `build()` si falta."""
+        while True:
+            with self._lock:
+                if self._add_ref(token):
+                    return DatasetHandle(self, token)
+                future = self._building.get(token)
+                owner = future is None
+                if owner:
+                    future = self._building[token] = Future()
+
+            if not owner:
+                # Otra sesión lo está construyendo: se espera y se vuelve a intentar
+                future.result()
+                continue
+
+            try:
+                dataset = build()
+            except BaseException as exc:
+                with self._lock:
+                    del self._building[token]
+                future.set_exception(exc)
+                raise
+            with self._lock:
+                del self._building[token]
+                self._datasets[token] = dataset
+                self._refs[token] = 0
+                self._add_ref(token)
+            future.set_result(None)
+            return DatasetHandle(self, token)
+
+    def _add_ref(self, token):
+        # Llamar con el lock tomado; False si el dataset no está registrado
+        if token not in self._datasets:
+            return False
+        self._datasets.move_to_end(token)
+        self._refs[token] += 1
+        self._evict()
+        return True
+
+    def get(self, handle):
+        """Dataset de un handle, o None si ya no está en el registro."""
+        with self._lock:
+            dataset = self._datasets.get(handle.token)
+            if dataset is not None:
+                self._datasets.move_to_end(handle.token)
+            return dataset
+
+    def release(self, token):
+        with self._lock:
+            if token in self._refs:
+                self._refs[token] = max(0, self._refs[token] - 1)
+                self._evict()
+
+    def stats(self):
+        """Lista de (token, referencias, bytes) de los datasets registrados."""
+        with self._lock:
+            return [
+                (token, self._refs[token], dataset_size(dataset))
+                for token, dataset in self._datasets.items()
+            ]
+
+    def _evict(self):
+        total = sum(dataset_size(d) for d in self._datasets.values())
+        for token in list(self._datasets):
+            if total <= self.max_bytes:
+                break
+            # Nunca se desaloja un dataset que alguna sesión está usando
+            if self._refs[token] > 0:
+                continue
+            total -= dataset_size(self._datasets.pop(token))
+            del self._refs[token]
+
+
+_shared_registry = None
+_shared_lock = threading.Lock()
+
+
+def shared_registry():
+    """Registro único del proceso (lo comparten app.py y las páginas)."""
+    global _shared_registry
+    with _shared_lock:
+        if _shared_registry is None:
+            _shared_registry = DatasetRegistry()
+        return _shared_registry
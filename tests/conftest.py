@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Los dashboards importan sus módulos por nombre: se agregan sus directorios al path
+SRC = Path(__file__).resolve().parents[1] / "src"
+for path in (SRC, SRC / "pima", SRC / "rita"):
+    sys.path.insert(0, str(path))
@@ -0,0 +1,93 @@
+import zipfile
+
+import pytest
+
+pl = pytest.importorskip("polars")
+pq = pytest.importorskip("pyarrow.parquet")
+pytest.importorskip("requests")
+
+import download
+from download import convert, download as download_months, partition_path, zip_name
+
+HEADER = "Year,Month,FlightDate,Reporting_Airline,Origin,Dest,CRSDepTime,DepDelay,ArrDelay,Cancelled,Diverted,Extra"
+
+
+def write_zip(directory, year, month, rows):
+    lines = [HEADER] + [
+        f"{year},{month},{year}-{month:02d}-{day:02d},AA,JFK,LAX,{800 + day},{day}.0,{day - 3}.0,0.00,0.00,x"
+        for day in range(1, rows + 1)
+    ]
+    path = directory / zip_name(year, month)
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"ontime_{year}_{month}.csv", "\n".join(lines) + "\n")
+    return path
+
+
+def test_convert_local_zips_to_hive_partitions(tmp_path):
+    zips, out = tmp_path / "zips", tmp_path / "parquet"
+    zips.mkdir()
+    write_zip(zips, 2024, 1, 5)
+    write_zip(zips, 2024, 12, 3)
+
+    convert(zips, out, workers=2)
+
+    january = pq.read_table(partition_path(out, 2024, 1))
+    assert january.num_rows == 5
+    assert january.schema == download.ARROW_SCHEMA
+    df = pl.scan_parquet(out / "**/*.parquet", hive_partitioning=True).collect()
+    assert df.height == 8
+    assert sorted(df["month"].unique().to_list()) == [1, 12]
+    # El CSV descomprimido nunca se escribe en disco
+    assert not list(tmp_path.rglob("*.csv"))
+
+
+def test_convert_skips_existing_partitions(tmp_path, capsys):
+    zips, out = tmp_path / "zips", tmp_path / "parquet"
+    zips.mkdir()
+    write_zip(zips, 2024, 3, 2)
+    convert(zips, out, workers=1)
+    convert(zips, out, workers=1)
+    assert "[skip]" in capsys.readouterr().out.splitlines()[-1]
+
+
+def test_download_skips_months_on_disk_without_network(tmp_path, monkeypatch, capsys):
+    write_zip(tmp_path, 2024, 1, 1)
+    monkeypatch.setattr(download.requests, "get", lambda *a, **k: pytest.fail("no debe usar la red"))
+    download_months([(2024, 1)], tmp_path, workers=1)
+    assert "[skip] 2024-01" in capsys.readouterr().out
+
+
+class FailingResponse:
+    status_code = 200
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, size):
+        yield b"PK\x03\x04partial"
+        raise OSError(28, "No space left on device")
+
+
+def test_write_error_leaves_no_zip(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(download.requests, "get", lambda *a, **k: FailingResponse())
+    download_months([(2024, 2)], tmp_path, workers=1)
+    assert "[error] 2024-02" in capsys.readouterr().out
+    assert not (tmp_path / zip_name(2024, 2)).exists()
+
+
+class TruncatedResponse(FailingResponse):
+    def iter_content(self, size):
+        yield b"not a zip"
+
+
+def test_invalid_download_is_not_published(tmp_path, monkeypatch):
+    monkeypatch.setattr(download.requests, "get", lambda *a, **k: TruncatedResponse())
+    download_months([(2024, 4)], tmp_path, workers=1)
+    assert not (tmp_path / zip_name(2024, 4)).exists()
+    assert not list(tmp_path.glob("*.part"))
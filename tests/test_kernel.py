@@ -0,0 +1,82 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+from sklearn.linear_model import LogisticRegression
+
+from kernel import LogisticKernel, check_parity
+
+FEATURES = ["Pregnancies", "Glucose", "BloodPressure", "SkinThickness", "Insulin", "BMI", "DiabetesPedigreeFunction", "Age"]
+CLEAN_COLUMNS = ["Glucose", "BloodPressure", "SkinThickness", "Insulin", "BMI"]
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        "Pregnancies": rng.integers(0, 12, 400),
+        "Glucose": rng.normal(120, 30, 400),
+        "BloodPressure": rng.normal(70, 12, 400),
+        "SkinThickness": rng.normal(29, 10, 400),
+        "Insulin": rng.normal(150, 90, 400),
+        "BMI": rng.normal(32, 7, 400),
+        "DiabetesPedigreeFunction": rng.gamma(2, 0.25, 400),
+        "Age": rng.integers(21, 80, 400),
+    }).astype(float)
+    y = (X["Glucose"] / 30 + X["BMI"] / 10 + rng.normal(0, 1, 400) > 7.2).astype(int)
+    model = LogisticRegression(solver="liblinear", random_state=42, max_iter=1000).fit(X, y)
+    means = X[CLEAN_COLUMNS].mean().to_dict()
+    return model, LogisticKernel.from_model(model, FEATURES, means), X, means
+
+
+def sklearn_proba(model, X, means):
+    # Misma imputación que load_data: ceros y faltantes de CLEAN_COLUMNS -> media
+    X = X.copy()
+    X[CLEAN_COLUMNS] = X[CLEAN_COLUMNS].replace(0, np.nan).fillna(means)
+    return model.predict_proba(X)[:, 1]
+
+
+def test_predict_proba_matches_sklearn(fitted):
+    model, kernel, X, means = fitted
+    np.testing.assert_allclose(kernel.predict_proba(X.to_numpy()), model.predict_proba(X)[:, 1], atol=1e-12)
+    assert check_parity(kernel, model, X.to_numpy()) <= 1e-9
+
+
+def test_zeros_and_nan_in_clean_columns_are_imputed(fitted):
+    model, kernel, X, means = fitted
+    X = X.head(50).copy()
+    X.loc[X.index[::3], "Glucose"] = 0
+    X.loc[X.index[1::3], "Insulin"] = np.nan
+    X.loc[X.index[2::3], ["BMI", "SkinThickness"]] = 0
+
+    proba, label = kernel.score(X.to_numpy())
+    expected = sklearn_proba(model, X, means)
+    np.testing.assert_allclose(proba, expected, atol=1e-12)
+    np.testing.assert_array_equal(label, (expected > 0.5).astype(np.int8))
+    for row, p in zip(X.to_numpy(), expected):
+        assert kernel.score_one(row.tolist())[0] == pytest.approx(p, abs=1e-12)
+
+
+@pytest.mark.parametrize("column", ["Pregnancies", "DiabetesPedigreeFunction", "Age"])
+def test_missing_required_feature_raises(fitted, column):
+    _, kernel, X, _ = fitted
+    row = X.head(1).copy()
+    row[column] = np.nan
+    with pytest.raises(ValueError, match=column):
+        kernel.score(row.to_numpy())
+    with pytest.raises(ValueError, match=column):
+        kernel.score_one(row.iloc[0].tolist())
+
+
+def test_required_lists_non_imputable_features(fitted):
+    _, kernel, _, _ = fitted
+    assert kernel.required == ["Pregnancies", "DiabetesPedigreeFunction", "Age"]
+
+
+def test_save_load_roundtrip(fitted, tmp_path):
+    _, kernel, X, _ = fitted
+    kernel.save(tmp_path / "kernel.npz")
+    loaded = LogisticKernel.load(tmp_path / "kernel.npz")
+    assert loaded.features == kernel.features
+    np.testing.assert_array_equal(loaded.predict_proba(X.to_numpy()), kernel.predict_proba(X.to_numpy()))
@@ -0,0 +1,17 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from scoring import parse_labels
+
+
+def test_parse_labels_accepts_binary_values():
+    labels = parse_labels(pd.Series([0, 1.0, "1", 0]))
+    assert labels.dtype == np.int64
+    np.testing.assert_array_equal(labels, [0, 1, 1, 0])
+
+
+def test_parse_labels_names_invalid_rows():
+    with pytest.raises(ValueError, match=r"filas 101, 103, 104$"):
+        parse_labels(pd.Series([1, None, 0, 2, "si"]), offset=100)